@@ -0,0 +1,82 @@
+"""Measure recipe page extraction throughput over saved tasty.co pages.
+
+Save some recipe pages once, then benchmark offline:
+
+    python benchmarks/bench_extractor.py record https://tasty.co/recipe/...
+    python benchmarks/bench_extractor.py run
+"""
+import argparse
+import time
+from pathlib import Path
+
+import requests
+from bs4 import BeautifulSoup
+
+from food_recipe.extractor import RECIPE_FIELDS, extract_recipe
+
+FIXTURES = Path(__file__).parent / "fixtures" / "recipes"
+
+
+def extract_recipe_baseline(html, category_name):
+    # The original extraction: full html.parser tree, select_one twice per field
+    recipe_page = BeautifulSoup(html, "html.parser").select_one('.recipe-page')
+    if not recipe_page:
+        return None
+    recipe_data = {"category": category_name}
+    for field, selector, many in RECIPE_FIELDS:
+        if many:
+            recipe_data[field] = [item.get_text(strip=True) for item in recipe_page.select(selector)]
+        else:
+            recipe_data[field] = recipe_page.select_one(selector).get_text(strip=True) if recipe_page.select_one(selector) else "N/A"
+    return recipe_data
+
+
+def record(urls):
+    FIXTURES.mkdir(parents=True, exist_ok=True)
+    with requests.Session() as session:
+        for url in urls:
+            name = url.rstrip("/").rsplit("/", 1)[-1]
+            (FIXTURES / f"{name}.html").write_bytes(session.get(url).content)
+            print(f"Saved {name}")
+
+
+def pages_per_second(extract, pages, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for html in pages:
+            extract(html, "Healthy")
+    return len(pages) * repeat / (time.perf_counter() - start)
+
+
+def run(repeat):
+    pages = [path.read_text(encoding="utf-8") for path in sorted(FIXTURES.glob("*.html"))]
+    if not pages:
+        raise SystemExit(f"No fixture pages in {FIXTURES}; run the record command first")
+
+    for html in pages:
+        assert extract_recipe(html, "Healthy") == extract_recipe_baseline(html, "Healthy")
+
+    baseline = pages_per_second(extract_recipe_baseline, pages, repeat)
+    print(f"{'baseline (html.parser)':<28}{baseline:>10.1f} pages/s")
+    for parser in ("html.parser", "lxml"):
+        try:
+            rate = pages_per_second(lambda html, category: extract_recipe(html, category, parser=parser), pages, repeat)
+        except Exception as e:
+            print(f"{'extractor (' + parser + ')':<28}{'unavailable':>10}  {e}")
+            continue
+        print(f"{'extractor (' + parser + ')':<28}{rate:>10.1f} pages/s  {rate / baseline:.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    record_parser = subparsers.add_parser("record")
+    record_parser.add_argument("urls", nargs="+")
+    run_parser = subparsers.add_parser("run")
+    run_parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    if args.command == "record":
+        record(args.urls)
+    else:
+        run(args.repeat)
@@ -0,0 +1,127 @@
+"""Compare wall time and peak RSS of the category listing backends.
+
+Record fixture pages once against the live site, then benchmark offline
+against a local server that replays them:
+
+    python benchmarks/bench_listing.py record /topic/healthy /topic/vegan
+    python benchmarks/bench_listing.py run
+"""
+import argparse
+import http.server
+import json
+import multiprocessing
+import resource
+import threading
+import time
+from pathlib import Path
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+import requests
+
+from food_recipe.listing import HttpListingBackend, SeleniumListingBackend
+
+FIXTURES = Path(__file__).parent / "fixtures" / "listing"
+LIVE_URL = "https://tasty.co"
+
+
+def fixture_key(url):
+    parts = urlsplit(url)
+    return f"{parts.path}?{urlencode(sorted(parse_qsl(parts.query)))}"
+
+
+class RecordingSession(requests.Session):
+    def __init__(self):
+        super().__init__()
+        self.index = {}
+
+    def get(self, url, **kwargs):
+        response = super().get(url, **kwargs)
+        name = f"{len(self.index):04d}.body"
+        (FIXTURES / name).write_bytes(response.content)
+        self.index[fixture_key(response.request.url)] = {
+            "file": name,
+            "content_type": response.headers.get("Content-Type", "text/html"),
+        }
+        return response
+
+
+def record(category_paths):
+    FIXTURES.mkdir(parents=True, exist_ok=True)
+    session = RecordingSession()
+    backend = HttpListingBackend(LIVE_URL, session=session)
+    for path in category_paths:
+        print(f"{path}: {len(backend.links(LIVE_URL + path))} links")
+    (FIXTURES / "index.json").write_text(json.dumps({"categories": category_paths, "responses": session.index}, indent=2))
+
+
+def serve_fixtures(index):
+    class Handler(http.server.BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            entry = index["responses"].get(fixture_key(self.path))
+            if entry is None:
+                self.send_response(404)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            body = (FIXTURES / entry["file"]).read_bytes()
+            self.send_response(200)
+            self.send_header("Content-Type", entry["content_type"])
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def run_backend(name, base_url, category_paths, results):
+    start = time.perf_counter()
+    backend = HttpListingBackend(base_url) if name == "http" else SeleniumListingBackend(click_delay=(0, 0))
+    try:
+        link_count = sum(len(backend.links(base_url + path)) for path in category_paths)
+    finally:
+        backend.close()
+    elapsed = time.perf_counter() - start
+    # ru_maxrss is in KiB on Linux; children covers the Chrome processes
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    child_rss = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    results.put((name, elapsed, link_count, rss / 1024, child_rss / 1024))
+
+
+def run(backends):
+    index = json.loads((FIXTURES / "index.json").read_text())
+    server = serve_fixtures(index)
+    base_url = f"http://127.0.0.1:{server.server_port}"
+
+    ctx = multiprocessing.get_context("spawn")
+    results = ctx.Queue()
+    print(f"{'backend':<10}{'wall s':>10}{'links':>8}{'RSS MiB':>10}{'child MiB':>11}")
+    for name in backends:
+        # A fresh process per backend keeps the RSS numbers independent
+        process = ctx.Process(target=run_backend, args=(name, base_url, index["categories"], results))
+        process.start()
+        process.join()
+        name, elapsed, link_count, rss, child_rss = results.get()
+        print(f"{name:<10}{elapsed:>10.2f}{link_count:>8}{rss:>10.1f}{child_rss:>11.1f}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    record_parser = subparsers.add_parser("record")
+    record_parser.add_argument("category_paths", nargs="+")
+    run_parser = subparsers.add_parser("run")
+    run_parser.add_argument("--backends", nargs="+", default=["http", "selenium"])
+    args = parser.parse_args()
+
+    if args.command == "record":
+        record(args.category_paths)
+    else:
+        run(args.backends)
@@ -0,0 +1,76 @@
+"""Compare per-row and vectorized nutrition parsing at increasing row counts.
+
+    python benchmarks/bench_nutrition.py --rows 10000 100000 1000000
+"""
+import argparse
+import random
+import re
+import time
+
+import numpy as np
+import pandas as pd
+
+from food_recipe.preprocess import NUMERIC_COLUMNS, extract_nutrition
+
+
+def extract_nutrition_baseline(nutrition):
+    # The original implementation: six re.search calls per row, then json_normalize
+    def extract(nutrition_str):
+        pattern = {
+            'calories': r"Calories\s*(\d+)",
+            'fat': r"Fat\s*([\d.]+)g",
+            'protein': r"Protein\s*([\d.]+)g",
+            'carbs': r"Carbs\s*([\d.]+)g",
+            'fiber': r"Fiber\s*([\d.]+)g",
+            'sugar': r"Sugar\s*([\d.]+)g"
+        }
+        nutrition_data = {}
+        for nutrient, regex in pattern.items():
+            match = re.search(regex, nutrition_str)
+            nutrition_data[nutrient] = float(match.group(1)) if match else None
+        return nutrition_data
+
+    return pd.json_normalize(nutrition.apply(extract))
+
+
+def make_nutrition(rows, seed=0):
+    rng = random.Random(seed)
+    templates = [
+        "Calories {c}, Fat {f}g, Carbs {cb}g, Fiber {fb}g, Sugar {s}g, Protein {p}g",
+        "Calories {c}, Carbs {cb}g, Protein {p}g",
+        "Fat {f}g, Sugar {s}g",
+        "",
+    ]
+    sample = [
+        rng.choice(templates).format(
+            c=rng.randint(50, 1200), f=rng.randint(0, 60), cb=rng.randint(0, 120),
+            fb=rng.randint(0, 20), s=rng.randint(0, 50), p=rng.randint(0, 80),
+        )
+        for _ in range(min(rows, 10000))
+    ]
+    return pd.Series((sample * (rows // len(sample) + 1))[:rows])
+
+
+def main(row_counts):
+    print(f"{'rows':>10}{'baseline s':>13}{'vectorized s':>15}{'speedup':>10}")
+    for rows in row_counts:
+        nutrition = make_nutrition(rows)
+
+        start = time.perf_counter()
+        baseline = extract_nutrition_baseline(nutrition)
+        baseline_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        vectorized = extract_nutrition(nutrition)
+        vectorized_time = time.perf_counter() - start
+
+        np.testing.assert_allclose(
+            baseline[NUMERIC_COLUMNS].to_numpy(dtype=float), vectorized[NUMERIC_COLUMNS].to_numpy(dtype=float)
+        )
+        print(f"{rows:>10}{baseline_time:>13.3f}{vectorized_time:>15.3f}{baseline_time / vectorized_time:>9.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    main(parser.parse_args().rows)
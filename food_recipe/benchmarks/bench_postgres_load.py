@@ -0,0 +1,69 @@
+"""Compare DataFrame.to_sql with the COPY-based loader against a local Postgres.
+
+The COPY loader replaces one category at a time, as the partitioned assets do.
+
+    python benchmarks/bench_postgres_load.py --dsn postgresql+psycopg2://postgres@localhost/Recipe
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import create_engine
+
+from food_recipe.postgres import RECIPE_TABLE_COLUMNS, replace_recipes_category
+from food_recipe.preprocess import allergen_masks
+
+
+def make_recipes(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    categories = np.array(["Healthy", "Vegetarian", "Low Carb", "High Protein", "Vegan", "Snacks"])
+    df = pd.DataFrame({
+        'category': categories[rng.integers(0, len(categories), rows)],
+        'name': [f"Recipe {i}" for i in range(rows)],
+        'total_time': "1 hr 10 min",
+        'prep_time': "20 min",
+        'cook_time': "50 min",
+        'total_minutes': 70,
+        'prep_minutes': 20,
+        'cook_minutes': 50,
+        'ingredients': "1 cup flour, 2 eggs, 1 tablespoon olive oil, salt, pepper",
+        'preparation_steps': "Mix everything. | Bake for 50 minutes. | Serve.",
+    })
+    for column, sql_type in RECIPE_TABLE_COLUMNS.items():
+        if sql_type == 'double precision':
+            df[column] = rng.uniform(0, 800, rows).round(1)
+    df['allergen_mask'] = allergen_masks(df['ingredients'])
+    return df
+
+
+def main(dsn, row_counts):
+    engine = create_engine(dsn)
+    print(f"{'rows':>10}{'to_sql rows/s':>16}{'COPY rows/s':>14}{'speedup':>10}")
+    try:
+        for rows in row_counts:
+            df = make_recipes(rows)
+
+            start = time.perf_counter()
+            df.to_sql("recipes_bench_to_sql", engine, if_exists="replace", index=False)
+            to_sql_rate = rows / (time.perf_counter() - start)
+
+            start = time.perf_counter()
+            for category, category_df in df.groupby('category'):
+                replace_recipes_category(engine, category_df, category, table="recipes_bench_copy")
+            copy_rate = rows / (time.perf_counter() - start)
+
+            print(f"{rows:>10}{to_sql_rate:>16.0f}{copy_rate:>14.0f}{copy_rate / to_sql_rate:>9.1f}x")
+    finally:
+        with engine.begin() as connection:
+            connection.exec_driver_sql(
+                "DROP TABLE IF EXISTS recipes_bench_to_sql, recipes_bench_copy, recipes_bench_copy_catalog_version"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dsn", required=True)
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000, 500_000])
+    args = parser.parse_args()
+    main(args.dsn, args.rows)
@@ -1,9 +1,28 @@
-from dagster import Definitions, load_assets_from_modules
+import os
+
+from dagster import Definitions, load_assets_from_modules, multiprocess_executor
 
 from food_recipe import assets  # noqa: TID252
+from food_recipe.parquet_io import ParquetIOManager
+from food_recipe.resources import MongoResource, PostgresResource
 
 all_assets = load_assets_from_modules([assets])
 
+# Steps of a run execute in separate processes, several at a time
 defs = Definitions(
     assets=all_assets,
+    resources={
+        "parquet_io_manager": ParquetIOManager(base_dir=os.getenv("RECIPE_PARQUET_DIR", "data/parquet")),
+        # Same RECIPE_DB_* variables as the Django app's settings
+        "postgres": PostgresResource(
+            host=os.getenv("RECIPE_DB_HOST", "localhost"),
+            port=int(os.getenv("RECIPE_DB_PORT", "5432")),
+            database=os.getenv("RECIPE_DB_NAME", "Recipe"),
+            user=os.getenv("RECIPE_DB_USER", "postgres"),
+            password=os.getenv("RECIPE_DB_PASSWORD", ""),
+            pool_size=int(os.getenv("RECIPE_DB_POOL_SIZE", "5")),
+        ),
+        "mongo": MongoResource(uri=os.getenv("RECIPE_MONGO_URI", "mongodb://localhost:27017/")),
+    },
+    executor=multiprocess_executor.configured({"max_concurrent": len(assets.RELEVANT_CATEGORIES)}),
 )
@@ -0,0 +1,50 @@
+import re
+
+import soupsieve
+from bs4 import BeautifulSoup, SoupStrainer
+
+# Prefer lxml's C parser when it is installed
+try:
+    import lxml  # noqa: F401
+    PARSER = "lxml"
+except ImportError:
+    PARSER = "html.parser"
+
+# Only the recipe container is built into a tree; the rest of the page
+# (navigation, ads, scripts) is discarded while parsing. The class is
+# matched as a pattern because the strainer sees the raw attribute string.
+RECIPE_PAGE = SoupStrainer(class_=re.compile(r"(^|\s)recipe-page(\s|$)"))
+
+# Declarative field spec: (field, selector, many). Text fields fall back to
+# "N/A" when missing, list fields to an empty list.
+RECIPE_FIELDS = (
+    ("name", ".recipe-name", False),
+    ("total_time", ".desktop-cooktimes .recipe-time-container div:nth-child(1) p", False),
+    ("prep_time", ".desktop-cooktimes .recipe-time-container div:nth-child(2) p", False),
+    ("cook_time", ".desktop-cooktimes .recipe-time-container div:nth-child(3) p", False),
+    ("ingredients", ".ingredients__section li", True),
+    ("preparation_steps", ".preparation li", True),
+    ("nutrition", ".nutrition-details li", True),
+)
+
+# Selectors are compiled once at import instead of on every call
+_RECIPE_PAGE_SELECTOR = soupsieve.compile(".recipe-page")
+_COMPILED_FIELDS = tuple(
+    (field, soupsieve.compile(selector), many) for field, selector, many in RECIPE_FIELDS
+)
+
+
+def extract_recipe(html, category_name, parser=PARSER):
+    soup = BeautifulSoup(html, parser, parse_only=RECIPE_PAGE)
+    recipe_page = _RECIPE_PAGE_SELECTOR.select_one(soup)
+    if recipe_page is None:
+        return None
+
+    recipe_data = {"category": category_name}
+    for field, selector, many in _COMPILED_FIELDS:
+        if many:
+            recipe_data[field] = [item.get_text(strip=True) for item in selector.select(recipe_page)]
+        else:
+            element = selector.select_one(recipe_page)
+            recipe_data[field] = element.get_text(strip=True) if element is not None else "N/A"
+    return recipe_data
@@ -0,0 +1,219 @@
+import asyncio
+import queue
+import random
+import threading
+from urllib.parse import urlsplit
+
+import aiohttp
+
+from food_recipe.extractor import extract_recipe
+from food_recipe.manifest import content_hash
+
+# Status codes worth retrying; anything else is returned to the caller as-is
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+_DONE = object()
+
+
+def response_headers_charset(headers):
+    content_type = headers.get("Content-Type", "")
+    for param in content_type.split(";")[1:]:
+        key, _, value = param.strip().partition("=")
+        if key.lower() == "charset" and value:
+            return value.strip('"')
+    return "utf-8"
+
+
+class HostRateLimiter:
+    # Hands out evenly spaced request slots per host so that concurrent
+    # workers never exceed `rate` requests per second against one site.
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate else 0.0
+        self._next_slot = {}
+        self._lock = asyncio.Lock()
+
+    async def wait(self, host):
+        if not self.interval:
+            return
+        loop = asyncio.get_running_loop()
+        async with self._lock:
+            now = loop.time()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self.interval
+        delay = slot - now
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+class RecipeFetcher:
+    def __init__(self, concurrency=16, per_host_rate=8.0, max_retries=3, backoff=0.5, timeout=30, headers=None, manifest=None):
+        self.concurrency = concurrency
+        self.per_host_rate = per_host_rate
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.headers = headers or {}
+        self.manifest = manifest
+        self.skipped_count = 0
+
+    def _session(self):
+        # One keep-alive pool shared by every worker for the whole crawl
+        connector = aiohttp.TCPConnector(limit=self.concurrency, keepalive_timeout=60)
+        return aiohttp.ClientSession(
+            connector=connector,
+            headers=self.headers,
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+        )
+
+    async def fetch(self, session, limiter, url, headers=None):
+        host = urlsplit(url).netloc
+        for attempt in range(self.max_retries + 1):
+            await limiter.wait(host)
+            try:
+                async with session.get(url, headers=headers) as response:
+                    if response.status in RETRY_STATUSES and attempt < self.max_retries:
+                        retry_after = response.headers.get("Retry-After")
+                        delay = float(retry_after) if retry_after and retry_after.isdigit() else None
+                        await self._sleep_backoff(attempt, delay)
+                        continue
+                    response.raise_for_status()
+                    body = await response.read()
+                    return response.status, response.headers, body
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                if attempt >= self.max_retries:
+                    raise
+                await self._sleep_backoff(attempt)
+
+    async def _sleep_backoff(self, attempt, delay=None):
+        if delay is None:
+            delay = self.backoff * (2 ** attempt)
+        await asyncio.sleep(delay + random.uniform(0, self.backoff))
+
+    async def _fetch_recipe(self, session, limiter, category_name, recipe_link):
+        manifest = self.manifest
+        headers = manifest.conditional_headers(recipe_link) if manifest else None
+        status, response_headers, body = await self.fetch(session, limiter, recipe_link, headers)
+
+        # Unchanged pages are dropped here, before any parsing or writing
+        if status == 304:
+            self.skipped_count += 1
+            return None
+        body_hash = content_hash(body)
+        if manifest and manifest.is_unchanged(recipe_link, body_hash):
+            self.skipped_count += 1
+            return None
+
+        html = body.decode(response_headers_charset(response_headers), errors="replace")
+        recipe_data = extract_recipe(html, category_name)
+        if not recipe_data:
+            return None
+        recipe_data["url"] = recipe_link
+        if manifest:
+            manifest.stage(
+                recipe_link,
+                response_headers.get("ETag"),
+                response_headers.get("Last-Modified"),
+                body_hash,
+            )
+        return recipe_data
+
+    async def crawl(self, jobs):
+        # `jobs` is an iterable of (category_name, recipe_url) pairs. Parsed
+        # recipe dicts are yielded in completion order, not submission order.
+        jobs_queue = asyncio.Queue()
+        for job in jobs:
+            jobs_queue.put_nowait(job)
+        results = asyncio.Queue(maxsize=self.concurrency * 2)
+        limiter = HostRateLimiter(self.per_host_rate)
+
+        async with self._session() as session:
+            async def worker():
+                while True:
+                    try:
+                        category_name, recipe_link = jobs_queue.get_nowait()
+                    except asyncio.QueueEmpty:
+                        return
+                    try:
+                        recipe_data = await self._fetch_recipe(session, limiter, category_name, recipe_link)
+                        if recipe_data:
+                            await results.put(recipe_data)
+                    except Exception as e:
+                        print(f"Error processing recipe {recipe_link}: {e}")
+
+            async def run_workers():
+                workers = [asyncio.create_task(worker()) for _ in range(self.concurrency)]
+                try:
+                    await asyncio.gather(*workers)
+                finally:
+                    for task in workers:
+                        task.cancel()
+                    await results.put(_DONE)
+
+            runner = asyncio.create_task(run_workers())
+            try:
+                while True:
+                    recipe_data = await results.get()
+                    if recipe_data is _DONE:
+                        break
+                    yield recipe_data
+            finally:
+                runner.cancel()
+                await asyncio.gather(runner, return_exceptions=True)
+
+    def iter_recipes(self, jobs):
+        # Synchronous bridge for Dagster assets: the event loop runs in a
+        # background thread and hands recipes over through a bounded queue,
+        # so the caller can write to Mongo while fetching continues.
+        handoff = queue.Queue(maxsize=self.concurrency * 2)
+        stop = threading.Event()
+
+        def hand_over(recipe_data):
+            # Waits for room in the queue, giving up once the caller stops
+            while not stop.is_set():
+                try:
+                    handoff.put(recipe_data, timeout=0.1)
+                    return True
+                except queue.Full:
+                    pass
+            return False
+
+        async def pump():
+            async for recipe_data in self.crawl(jobs):
+                if stop.is_set():
+                    break
+                # A full queue is waited on off the event loop, so downloads,
+                # rate limiting and timeouts keep running while the caller
+                # is busy writing
+                try:
+                    handoff.put_nowait(recipe_data)
+                except queue.Full:
+                    if not await asyncio.to_thread(hand_over, recipe_data):
+                        break
+
+        def run():
+            try:
+                asyncio.run(pump())
+            except BaseException as e:
+                handoff.put(e)
+            else:
+                handoff.put(_DONE)
+
+        thread = threading.Thread(target=run, name="recipe-fetcher", daemon=True)
+        thread.start()
+        try:
+            while True:
+                item = handoff.get()
+                if item is _DONE:
+                    break
+                if isinstance(item, BaseException):
+                    raise item
+                yield item
+        finally:
+            stop.set()
+            # Drain so a producer blocked on a full queue can observe `stop`
+            while thread.is_alive():
+                try:
+                    handoff.get(timeout=0.1)
+                except queue.Empty:
+                    pass
+            thread.join()
@@ -0,0 +1,9 @@
+import hashlib
+
+
+def stable_id(*parts):
+    # First 8 bytes of the MD5 of the parts joined with \x1f, as a signed
+    # bigint. Ids stay the same across runs and machines, so tables loaded at
+    # different times can be joined on them.
+    digest = hashlib.md5("\x1f".join(parts).encode()).digest()
+    return int.from_bytes(digest[:8], 'big', signed=True)
@@ -0,0 +1,169 @@
+import re
+from functools import lru_cache
+
+import pandas as pd
+
+from food_recipe.ids import stable_id
+
+UNICODE_FRACTIONS = {
+    '½': ' 1/2', '⅓': ' 1/3', '⅔': ' 2/3', '¼': ' 1/4', '¾': ' 3/4',
+    '⅕': ' 1/5', '⅙': ' 1/6', '⅛': ' 1/8', '⅜': ' 3/8', '⅝': ' 5/8', '⅞': ' 7/8',
+}
+
+# Canonical unit -> spellings seen in ingredient lines
+UNITS = {
+    'cup': ['cup', 'cups', 'c'],
+    'tablespoon': ['tablespoon', 'tablespoons', 'tbsp', 'tbs'],
+    'teaspoon': ['teaspoon', 'teaspoons', 'tsp'],
+    'fluid ounce': ['fl oz', 'fluid ounce', 'fluid ounces'],
+    'ounce': ['ounce', 'ounces', 'oz'],
+    'pound': ['pound', 'pounds', 'lb', 'lbs'],
+    'gram': ['gram', 'grams', 'g'],
+    'kilogram': ['kilogram', 'kilograms', 'kg'],
+    'milliliter': ['milliliter', 'milliliters', 'ml'],
+    'liter': ['liter', 'liters', 'litre', 'litres', 'l'],
+    'pinch': ['pinch', 'pinches'],
+    'dash': ['dash', 'dashes'],
+    'clove': ['clove', 'cloves'],
+    'can': ['can', 'cans'],
+    'slice': ['slice', 'slices'],
+    'package': ['package', 'packages', 'pack', 'packs'],
+    'stick': ['stick', 'sticks'],
+    'sprig': ['sprig', 'sprigs'],
+    'bunch': ['bunch', 'bunches'],
+    'handful': ['handful', 'handfuls'],
+    'head': ['head', 'heads'],
+}
+UNIT_ALIASES = {alias: unit for unit, aliases in UNITS.items() for alias in aliases}
+
+# Words describing how an ingredient is cut or sized rather than what it is
+DESCRIPTORS = {
+    'chopped', 'diced', 'minced', 'sliced', 'grated', 'shredded', 'crushed', 'cubed',
+    'peeled', 'halved', 'quartered', 'trimmed', 'melted', 'softened', 'beaten',
+    'finely', 'roughly', 'thinly', 'freshly', 'fresh', 'large', 'medium', 'small',
+    'optional', 'packed', 'heaping', 'about',
+}
+
+# Canonical names for common variants of the same ingredient
+ALIASES = {
+    'scallion': 'green onion',
+    'spring onion': 'green onion',
+    'all-purpose flour': 'flour',
+    'kosher salt': 'salt',
+    'sea salt': 'salt',
+    'ground black pepper': 'black pepper',
+    'extra virgin olive oil': 'olive oil',
+    'extra-virgin olive oil': 'olive oil',
+}
+
+# Plural-looking words that are already singular
+INVARIANT_WORDS = {'hummus', 'asparagus', 'couscous', 'molasses', 'swiss', 'brussels', 'citrus', 'bass', 'grass', 'greens'}
+
+_NUMBER = r"\d+\s+\d+/\d+|\d+/\d+|\d*\.\d+|\d+"
+QUANTITY_PATTERN = re.compile(rf"^(?P<quantity>{_NUMBER})(?:\s*(?:-|to)\s*(?:{_NUMBER}))?\s*")
+UNIT_PATTERN = re.compile(
+    r"^(?P<unit>" + "|".join(re.escape(alias) for alias in sorted(UNIT_ALIASES, key=len, reverse=True)) + r")\b\.?\s*"
+)
+PARENTHESES_PATTERN = re.compile(r"\([^)]*\)")
+
+
+def parse_number(text):
+    whole, _, fraction = text.strip().rpartition(' ')
+    if '/' in fraction:
+        numerator, denominator = fraction.split('/')
+        value = int(numerator) / int(denominator) if int(denominator) else 0.0
+    else:
+        value = float(fraction)
+    return value + (float(whole) if whole else 0.0)
+
+
+def singular(word):
+    if word in INVARIANT_WORDS or len(word) <= 3:
+        return word
+    if word.endswith('ies'):
+        return word[:-3] + 'y'
+    if word.endswith(('oes', 'ches', 'shes', 'sses', 'xes')):
+        return word[:-2]
+    if word.endswith('s') and not word.endswith(('ss', 'us')):
+        return word[:-1]
+    return word
+
+
+@lru_cache(maxsize=None)
+def canonical_name(text):
+    # The name part of a line: no parentheses, no trailing ", chopped" or
+    # ", to taste", no size or cut words, last word singular
+    name = PARENTHESES_PATTERN.sub(' ', text).split(',')[0]
+    words = [word for word in name.split() if word not in DESCRIPTORS]
+    if words and words[0] == 'of':
+        words = words[1:]
+    if words:
+        words[-1] = singular(words[-1])
+    name = ' '.join(words)
+    return ALIASES.get(name, name)
+
+
+@lru_cache(maxsize=None)
+def parse_ingredient(line):
+    # "1 ½ cups milk, warmed" -> (1.5, "cup", "milk"). Quantity and unit are
+    # None when the line has none; the name is "" when nothing is left.
+    text = line.lower()
+    for fraction, replacement in UNICODE_FRACTIONS.items():
+        text = text.replace(fraction, replacement)
+    text = PARENTHESES_PATTERN.sub(' ', text).strip()
+
+    quantity = None
+    match = QUANTITY_PATTERN.match(text)
+    if match:
+        quantity = parse_number(match.group('quantity'))
+        text = text[match.end():]
+
+    # Size words may come before the unit, as in "1 large head lettuce"
+    words = text.split()
+    while words and words[0] in DESCRIPTORS:
+        words = words[1:]
+    text = ' '.join(words)
+
+    unit = None
+    match = UNIT_PATTERN.match(text)
+    # A bare "c", "g" or "l" is only a unit right after a quantity
+    if match and (quantity is not None or len(match.group('unit')) > 1):
+        unit = UNIT_ALIASES[match.group('unit')]
+        text = text[match.end():]
+
+    return quantity, unit, canonical_name(text)
+
+
+def parse_recipe_ingredients(df):
+    # Splits the scraped ingredient lines of each recipe into an edge table
+    # (recipe_id, ingredient_id, position, quantity, unit) and a dictionary of
+    # the canonical ingredient names, both keyed by stable ids
+    edges = {'recipe_id': [], 'ingredient_id': [], 'position': [], 'quantity': [], 'unit': []}
+    names = {}
+    for category, name, lines in zip(df['category'], df['name'], df['ingredient_lines']):
+        recipe_id = stable_id(category, name)
+        seen = set()
+        for line in lines:
+            quantity, unit, ingredient = parse_ingredient(line)
+            if not ingredient:
+                continue
+            if ingredient not in names:
+                names[ingredient] = stable_id(ingredient)
+            ingredient_id = names[ingredient]
+            if ingredient_id in seen:
+                continue
+            seen.add(ingredient_id)
+            edges['recipe_id'].append(recipe_id)
+            edges['ingredient_id'].append(ingredient_id)
+            edges['position'].append(len(seen) - 1)
+            edges['quantity'].append(quantity)
+            edges['unit'].append(unit)
+
+    edges = pd.DataFrame(edges).astype({
+        'recipe_id': 'int64', 'ingredient_id': 'int64', 'position': 'int16',
+        'quantity': 'float32', 'unit': 'category',
+    })
+    ingredients = pd.DataFrame(
+        {'id': list(names.values()), 'name': list(names.keys())}
+    ).astype({'id': 'int64'})
+    return ingredients, edges
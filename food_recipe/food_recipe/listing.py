@@ -0,0 +1,146 @@
+import random
+import time
+from urllib.parse import urlsplit
+
+import requests
+from bs4 import BeautifulSoup
+
+# Listing backends return the recipe hrefs (site-relative paths) found on a
+# category page, in feed order and without duplicates.
+
+
+def links_from_html(html):
+    soup = BeautifulSoup(html, "html.parser")
+    return [item.get('href') for item in soup.select('.feed-item a') if item.get('href')]
+
+
+def links_from_feed(payload):
+    links = []
+    for item in payload.get("items", []):
+        if item.get("url"):
+            links.append(item["url"])
+        elif item.get("type") and item.get("slug"):
+            links.append(f"/{item['type']}/{item['slug']}")
+    return links
+
+
+class HttpListingBackend:
+    # Pages through a category with the same feed endpoint the "Show more"
+    # button calls, using plain keep-alive HTTP requests and offsets.
+    feed_path = "/api/proxy/tasty/feed-page"
+
+    def __init__(self, base_url, page_size=20, max_pages=500, session=None):
+        self.base_url = base_url
+        self.page_size = page_size
+        self.max_pages = max_pages
+        self.session = session or requests.Session()
+
+    def links(self, category_url):
+        feed_type, _, slug = urlsplit(category_url).path.strip("/").rpartition("/")
+
+        response = self.session.get(category_url)
+        response.raise_for_status()
+        links = []
+        seen = set()
+        self._extend(links, seen, links_from_html(response.text))
+
+        offset = len(links)
+        for _ in range(self.max_pages):
+            response = self.session.get(
+                f"{self.base_url}{self.feed_path}",
+                params={"from": offset, "size": self.page_size, "slug": slug, "type": feed_type},
+            )
+            response.raise_for_status()
+            if "json" in response.headers.get("Content-Type", ""):
+                page_links = links_from_feed(response.json())
+            else:
+                page_links = links_from_html(response.text)
+            if not self._extend(links, seen, page_links):
+                break
+            offset += self.page_size
+        return links
+
+    @staticmethod
+    def _extend(links, seen, page_links):
+        added = 0
+        for link in page_links:
+            if link not in seen:
+                seen.add(link)
+                links.append(link)
+                added += 1
+        return added
+
+    def close(self):
+        self.session.close()
+
+
+class SeleniumListingBackend:
+    # Drives a real Chrome and keeps clicking "Show more". Expensive, so it is
+    # only started when first needed.
+    def __init__(self, click_delay=(1, 3)):
+        from selenium import webdriver
+        from selenium.webdriver.chrome.options import Options
+        from selenium.webdriver.chrome.service import Service
+        from webdriver_manager.chrome import ChromeDriverManager
+
+        service = Service(ChromeDriverManager().install())
+        options = Options()
+        options.add_argument("--start-maximized")
+        self.driver = webdriver.Chrome(service=service, options=options)
+        self.click_delay = click_delay
+
+    def links(self, category_url):
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support import expected_conditions as EC
+        from selenium.webdriver.support.ui import WebDriverWait
+
+        self.driver.get(category_url)
+        while True:
+            try:
+                show_more_button = WebDriverWait(self.driver, 10).until(
+                    EC.element_to_be_clickable((By.XPATH, "//button[contains(text(), 'Show more')]"))
+                )
+                self.driver.execute_script("arguments[0].click();", show_more_button)
+                time.sleep(random.uniform(*self.click_delay))
+            except Exception:
+                break
+
+        return list(dict.fromkeys(links_from_html(self.driver.page_source)))
+
+    def close(self):
+        self.driver.quit()
+
+
+class FallbackListingBackend:
+    # Uses the HTTP backend and falls back to Selenium for any category it
+    # cannot page through.
+    def __init__(self, primary, fallback_factory):
+        self.primary = primary
+        self.fallback_factory = fallback_factory
+        self.fallback = None
+
+    def links(self, category_url):
+        try:
+            links = self.primary.links(category_url)
+            if links:
+                return links
+            print(f"No listing results over HTTP for {category_url}, falling back")
+        except Exception as e:
+            print(f"HTTP listing failed for {category_url}: {e}, falling back")
+
+        if self.fallback is None:
+            self.fallback = self.fallback_factory()
+        return self.fallback.links(category_url)
+
+    def close(self):
+        self.primary.close()
+        if self.fallback is not None:
+            self.fallback.close()
+
+
+def get_listing_backend(name, base_url):
+    if name == "http":
+        return FallbackListingBackend(HttpListingBackend(base_url), SeleniumListingBackend)
+    if name == "selenium":
+        return SeleniumListingBackend()
+    raise ValueError(f"Unknown listing backend: {name}")
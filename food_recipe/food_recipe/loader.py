@@ -0,0 +1,27 @@
+import pandas as pd
+
+# Fields read from Mongo; everything else (including _id) stays on the server
+RECIPE_COLUMNS = [
+    'category', 'name', 'total_time', 'prep_time', 'cook_time',
+    'ingredients', 'preparation_steps', 'nutrition',
+]
+
+
+def iter_recipe_frames(collection, chunk_size, query=None):
+    # Streams the collection with a projection and yields one DataFrame per
+    # `chunk_size` documents, so raw documents never pile up in memory.
+    projection = dict.fromkeys(RECIPE_COLUMNS, 1)
+    projection['_id'] = 0
+    cursor = collection.find(query or {}, projection, batch_size=chunk_size)
+
+    rows = []
+    try:
+        for document in cursor:
+            rows.append(document)
+            if len(rows) >= chunk_size:
+                yield pd.DataFrame.from_records(rows, columns=RECIPE_COLUMNS)
+                rows = []
+        if rows:
+            yield pd.DataFrame.from_records(rows, columns=RECIPE_COLUMNS)
+    finally:
+        cursor.close()
@@ -0,0 +1,67 @@
+import hashlib
+from datetime import datetime, timezone
+
+from pymongo import UpdateOne
+
+
+def content_hash(body):
+    return hashlib.sha256(body).hexdigest()
+
+
+class CrawlManifest:
+    # Remembers, per recipe URL, the validators and body hash seen on the
+    # last successful crawl of `category`. A recipe listed under several
+    # categories is stored once per category, so each category keeps its own
+    # entries and one category's crawl never skips a page for another.
+    # Entries are staged while a page is in flight and only committed once
+    # the recipe has been written, so a failed run never marks an unwritten
+    # page as up to date.
+    def __init__(self, collection, category):
+        self.collection = collection
+        self.category = category
+        self.entries = {
+            doc["_id"]["url"]: doc
+            for doc in collection.find(
+                {"_id.category": category}, {"etag": 1, "last_modified": 1, "content_hash": 1},
+            )
+        }
+        self._staged = {}
+        self._pending = []
+
+    def conditional_headers(self, url):
+        entry = self.entries.get(url)
+        if not entry:
+            return {}
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def is_unchanged(self, url, body_hash):
+        entry = self.entries.get(url)
+        return entry is not None and entry.get("content_hash") == body_hash
+
+    def stage(self, url, etag, last_modified, body_hash):
+        self._staged[url] = {
+            "etag": etag,
+            "last_modified": last_modified,
+            "content_hash": body_hash,
+        }
+
+    def commit(self, url):
+        entry = self._staged.pop(url, None)
+        if entry is None:
+            return
+        entry["fetched_at"] = datetime.now(timezone.utc)
+        key = {"category": self.category, "url": url}
+        self.entries[url] = dict(entry, _id=key)
+        self._pending.append(UpdateOne({"_id": key}, {"$set": entry}, upsert=True))
+        if len(self._pending) >= 500:
+            self.flush()
+
+    def flush(self):
+        if self._pending:
+            self.collection.bulk_write(self._pending, ordered=False)
+            self._pending = []
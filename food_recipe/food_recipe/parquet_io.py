@@ -0,0 +1,53 @@
+import os
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from dagster import ConfigurableIOManager, InputContext, OutputContext
+
+# Low-cardinality text columns stored dictionary-encoded
+DICTIONARY_COLUMNS = ['category', 'unit']
+
+
+class ParquetIOManager(ConfigurableIOManager):
+    # Stores DataFrame outputs as one Parquet file per partition, laid out as
+    # <base_dir>/<asset key>/category=<partition>/data.parquet. Inputs are
+    # read back memory-mapped, limited to the columns listed in the input's
+    # "columns" metadata when there is one.
+    base_dir: str
+
+    def _asset_dir(self, context):
+        return os.path.join(self.base_dir, *context.asset_key.path)
+
+    def _path(self, asset_dir, partition_key):
+        return os.path.join(asset_dir, f"category={partition_key}", "data.parquet")
+
+    def handle_output(self, context: OutputContext, obj: pd.DataFrame):
+        partition_key = context.partition_key if context.has_partition_key else "__all__"
+        path = self._path(self._asset_dir(context), partition_key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        table = pa.Table.from_pandas(obj, preserve_index=False)
+        for column in DICTIONARY_COLUMNS:
+            index = table.schema.get_field_index(column)
+            if index >= 0 and not pa.types.is_dictionary(table.schema.field(index).type):
+                table = table.set_column(index, column, table.column(column).dictionary_encode())
+
+        # Written beside the target and renamed over it, so a failed write
+        # never leaves a truncated file for downstream runs
+        temp_path = f"{path}.tmp"
+        pq.write_table(table, temp_path, compression='zstd')
+        os.replace(temp_path, path)
+        context.add_output_metadata({"path": path, "bytes": os.path.getsize(path)})
+
+    def load_input(self, context: InputContext):
+        asset_dir = self._asset_dir(context)
+        if context.has_asset_partitions:
+            paths = [self._path(asset_dir, key) for key in context.asset_partition_keys]
+        else:
+            paths = [self._path(asset_dir, "__all__")]
+        columns = (context.definition_metadata or {}).get("columns")
+
+        tables = [pq.read_table(path, columns=columns, memory_map=True) for path in paths]
+        table = tables[0] if len(tables) == 1 else pa.concat_tables(tables, promote_options="permissive")
+        return table.to_pandas(self_destruct=True, split_blocks=True)
@@ -0,0 +1,376 @@
+import io
+
+import pandas as pd
+
+from food_recipe.ids import stable_id
+
+# Column layout of the recipes table the Django app reads from
+RECIPE_TABLE_COLUMNS = {
+    'id': 'bigint',
+    'category': 'text',
+    'name': 'text',
+    'total_time': 'text',
+    'prep_time': 'text',
+    'cook_time': 'text',
+    'total_minutes': 'integer',
+    'prep_minutes': 'integer',
+    'cook_minutes': 'integer',
+    'ingredients': 'text',
+    'preparation_steps': 'text',
+    'calories': 'double precision',
+    'fat': 'double precision',
+    'protein': 'double precision',
+    'carbs': 'double precision',
+    'fiber': 'double precision',
+    'sugar': 'double precision',
+    'allergen_mask': 'integer',
+}
+
+# Bookkeeping columns maintained by the loader. Rows that disappear from the
+# source are soft-deleted by setting deleted_at rather than removed.
+TRACKING_COLUMNS = {
+    'content_hash': 'bigint NOT NULL',
+    'updated_at': 'timestamptz NOT NULL DEFAULT now()',
+    'deleted_at': 'timestamptz',
+}
+
+RECIPE_KEY = ['category', 'name']
+
+# Stable recipe id derived from the (category, name) key, computed in SQL the
+# same way ids.stable_id() computes it in Python
+RECIPE_ID_SQL = "('x' || left(md5(category || chr(31) || name), 16))::bit(64)::bigint"
+
+# Indexes created on every recipes table, by name suffix. The pkey index is
+# promoted to the primary key. The (category, ...) indexes serve the
+# planner's category scans and time-budget filters, and the trigram index
+# ILIKE searches for custom allergens. updated_at lets the Django sync read
+# only rows changed since its last run.
+RECIPE_INDEXES = {
+    'pkey': 'CREATE UNIQUE INDEX IF NOT EXISTS {index} ON {table} (id)',
+    'category_name_key': 'CREATE UNIQUE INDEX IF NOT EXISTS {index} ON {table} (category, name)',
+    'category_calories_idx': 'CREATE INDEX IF NOT EXISTS {index} ON {table} (category, calories)',
+    'category_prep_minutes_idx': 'CREATE INDEX IF NOT EXISTS {index} ON {table} (category, prep_minutes)',
+    'category_allergen_mask_idx': 'CREATE INDEX IF NOT EXISTS {index} ON {table} (category, allergen_mask)',
+    'updated_at_idx': 'CREATE INDEX IF NOT EXISTS {index} ON {table} (updated_at)',
+    'ingredients_trgm_idx': 'CREATE INDEX IF NOT EXISTS {index} ON {table} USING gin (ingredients gin_trgm_ops)',
+}
+
+# Indexes older loaders created that no query uses any more, dropped from
+# existing recipes tables so loads stop paying to maintain them
+OBSOLETE_RECIPE_INDEXES = ['ingredients_gin_idx']
+
+# Canonical ingredients and the recipe -> ingredient edges parsed from the
+# scraped ingredient lines, keyed by stable ids (recipe_id is recipes.id)
+INGREDIENT_TABLE_COLUMNS = {
+    'id': 'bigint PRIMARY KEY',
+    'name': 'text NOT NULL',
+}
+
+RECIPE_INGREDIENT_TABLE_COLUMNS = {
+    'recipe_id': 'bigint NOT NULL',
+    'ingredient_id': 'bigint NOT NULL',
+    'position': 'smallint NOT NULL',
+    'quantity': 'real',
+    'unit': 'text',
+}
+
+RECIPE_INGREDIENT_CONSTRAINTS = ['PRIMARY KEY (recipe_id, ingredient_id)']
+
+# Recipes using an ingredient
+RECIPE_INGREDIENT_INDEXES = {
+    'ingredient_id_idx': 'CREATE INDEX IF NOT EXISTS {index} ON {table} (ingredient_id)',
+}
+
+# Marker for NULL in the CSV stream, so that empty strings stay empty strings
+COPY_NULL = '\\N'
+
+
+def create_catalog_version_sql(table):
+    return (
+        f"CREATE TABLE IF NOT EXISTS {table}_catalog_version ("
+        f"id smallint PRIMARY KEY DEFAULT 1 CHECK (id = 1), "
+        f"version bigint NOT NULL, "
+        f"updated_at timestamptz NOT NULL DEFAULT now())"
+    )
+
+
+def bump_catalog_version(cursor, table):
+    # The Django app caches the catalog in memory and reloads it when this
+    # number changes, so it is bumped in the same transaction as the data.
+    # The table itself is created by ensure_recipes_table.
+    cursor.execute(
+        f"INSERT INTO {table}_catalog_version (id, version) VALUES (1, 1) "
+        f"ON CONFLICT (id) DO UPDATE SET version = {table}_catalog_version.version + 1, updated_at = now()"
+    )
+
+
+def create_table_sql(table, if_not_exists=False, columns=None, constraints=()):
+    columns = columns or {**RECIPE_TABLE_COLUMNS, **TRACKING_COLUMNS}
+    definitions = ",\n    ".join(
+        [f"{column} {sql_type}" for column, sql_type in columns.items()] + list(constraints)
+    )
+    exists_clause = "IF NOT EXISTS " if if_not_exists else ""
+    return f"CREATE TABLE {exists_clause}{table} (\n    {definitions}\n)"
+
+
+def enable_trigram(cursor):
+    # pg_trgm ships with contrib, which not every server has installed
+    cursor.execute("SAVEPOINT enable_trigram")
+    try:
+        cursor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    except Exception as e:
+        cursor.execute("ROLLBACK TO SAVEPOINT enable_trigram")
+        print(f"pg_trgm unavailable, skipping trigram indexes: {e}")
+        return False
+    cursor.execute("RELEASE SAVEPOINT enable_trigram")
+    return True
+
+
+def create_indexes(cursor, table, indexes=RECIPE_INDEXES, obsolete=()):
+    # Only missing indexes are created: CREATE INDEX IF NOT EXISTS still waits
+    # for a lock that blocks writes, even when the index is already there.
+    # Likewise only obsolete indexes that exist are dropped.
+    cursor.execute("SELECT indexname FROM pg_indexes WHERE schemaname = current_schema() AND tablename = %s", (table,))
+    existing = {row[0] for row in cursor.fetchall()}
+    for suffix in obsolete:
+        if f"{table}_{suffix}" in existing:
+            cursor.execute(f"DROP INDEX {table}_{suffix}")
+    missing = {suffix: statement for suffix, statement in indexes.items() if f"{table}_{suffix}" not in existing}
+
+    has_trigram = any('gin_trgm_ops' in statement for statement in missing.values()) and enable_trigram(cursor)
+    for suffix, statement in missing.items():
+        if 'gin_trgm_ops' in statement and not has_trigram:
+            continue
+        cursor.execute(statement.format(index=f"{table}_{suffix}", table=table))
+
+    if 'pkey' not in indexes:
+        return
+    cursor.execute("SELECT 1 FROM pg_constraint WHERE conrelid = %s::regclass AND contype = 'p'", (table,))
+    if cursor.fetchone() is None:
+        cursor.execute(f"ALTER TABLE {table} ADD CONSTRAINT {table}_pkey PRIMARY KEY USING INDEX {table}_pkey")
+
+
+def recipe_ids(df):
+    return pd.Series(
+        [stable_id(category, name) for category, name in zip(df['category'], df['name'])],
+        index=df.index,
+        dtype='int64',
+    )
+
+
+def with_content_hash(df):
+    # Adds the recipe id and a stable 64-bit hash of every content column;
+    # pandas hashes with a fixed key, so the hash is the same across runs
+    df = df.assign(id=recipe_ids(df))
+    hashes = pd.util.hash_pandas_object(df[list(RECIPE_TABLE_COLUMNS)], index=False)
+    return df.assign(content_hash=hashes.to_numpy().view('int64'))
+
+
+def copy_frame(cursor, table, df, columns=None, batch_rows=50000):
+    # Streams the frame through COPY FROM STDIN as CSV, one slice at a time so
+    # the text buffer never holds more than `batch_rows` rows.
+    columns = columns or list(RECIPE_TABLE_COLUMNS) + ['content_hash']
+    statement = (
+        f"COPY {table} ({', '.join(columns)}) FROM STDIN "
+        f"WITH (FORMAT csv, NULL '{COPY_NULL}')"
+    )
+    for start in range(0, len(df), batch_rows):
+        buffer = io.StringIO()
+        df[columns].iloc[start:start + batch_rows].to_csv(buffer, index=False, header=False, na_rep=COPY_NULL)
+        buffer.seek(0)
+        cursor.copy_expert(statement, buffer)
+
+
+def ensure_recipes_table(connection, table):
+    # Tables written by older loaders lack some columns; added columns stay
+    # nullable unless they have a default to fill existing rows with.
+    # Partitions load concurrently, so schema changes run in their own short
+    # transaction under an advisory lock instead of holding DDL locks for
+    # the whole load.
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT pg_advisory_xact_lock(hashtext(%s))", (table,))
+        cursor.execute(create_table_sql(table, if_not_exists=True))
+        cursor.execute(create_catalog_version_sql(table))
+        cursor.execute(
+            "SELECT column_name FROM information_schema.columns "
+            "WHERE table_schema = current_schema() AND table_name = %s",
+            (table,),
+        )
+        existing = {row[0] for row in cursor.fetchall()}
+        for column, sql_type in {**RECIPE_TABLE_COLUMNS, **TRACKING_COLUMNS}.items():
+            if column in existing:
+                continue
+            if 'DEFAULT' not in sql_type:
+                sql_type = sql_type.replace(' NOT NULL', '')
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {sql_type}")
+        if 'id' not in existing:
+            cursor.execute(f"UPDATE {table} SET id = {RECIPE_ID_SQL} WHERE id IS NULL")
+        create_indexes(cursor, table, obsolete=OBSOLETE_RECIPE_INDEXES)
+    connection.commit()
+
+
+def upsert_delta_sql(table):
+    # Inserts or updates every row of the {table}_delta temp table, reviving
+    # soft-deleted rows
+    content_columns = list(RECIPE_TABLE_COLUMNS) + ['content_hash']
+    assignments = ", ".join(
+        f"{column} = EXCLUDED.{column}" for column in content_columns if column not in RECIPE_KEY
+    )
+    return (
+        f"INSERT INTO {table} ({', '.join(content_columns)}) "
+        f"SELECT {', '.join(content_columns)} FROM {table}_delta "
+        f"ON CONFLICT ({', '.join(RECIPE_KEY)}) DO UPDATE SET {assignments}, "
+        f"updated_at = now(), deleted_at = NULL"
+    )
+
+
+def merge_recipes_table(engine, df, table="recipes", category=None):
+    # Upserts only new or changed rows, found by comparing content hashes with
+    # the ones already stored, and soft-deletes rows missing from `df`. With
+    # a category, `df` holds just that category and only its rows are
+    # compared and soft-deleted.
+    df = with_content_hash(df.drop_duplicates(RECIPE_KEY, keep='last'))
+    content_columns = list(RECIPE_TABLE_COLUMNS) + ['content_hash']
+    scope, scope_params = ("WHERE category = %s", (category,)) if category is not None else ("", ())
+    connection = engine.raw_connection()
+    try:
+        ensure_recipes_table(connection, table)
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT category, name, content_hash, deleted_at IS NULL FROM {table} {scope}", scope_params)
+            existing = pd.DataFrame(cursor.fetchall(), columns=RECIPE_KEY + ['content_hash', 'live'])
+            existing['content_hash'] = existing['content_hash'].astype('Int64')
+            live = existing[existing['live'].astype(bool)]
+
+            # A row is unchanged when a live row with the same key and hash exists
+            key_and_hash = RECIPE_KEY + ['content_hash']
+            unchanged = df[key_and_hash].merge(live[key_and_hash], on=key_and_hash, how='left', indicator=True)['_merge'] == 'both'
+            delta = df.loc[~unchanged.to_numpy(), content_columns]
+            is_new = delta[RECIPE_KEY].merge(existing[RECIPE_KEY], on=RECIPE_KEY, how='left', indicator=True)['_merge'] == 'left_only'
+
+            gone = live[RECIPE_KEY].merge(df[RECIPE_KEY], on=RECIPE_KEY, how='left', indicator=True)
+            gone = gone[gone['_merge'] == 'left_only']
+
+            if len(delta):
+                cursor.execute(f"CREATE TEMP TABLE {table}_delta (LIKE {table} INCLUDING DEFAULTS) ON COMMIT DROP")
+                copy_frame(cursor, f"{table}_delta", delta)
+                cursor.execute(upsert_delta_sql(table))
+
+            if len(gone):
+                cursor.execute(
+                    f"UPDATE {table} AS t SET deleted_at = now(), updated_at = now() "
+                    f"FROM unnest(%s::text[], %s::text[]) AS gone(category, name) "
+                    f"WHERE t.category = gone.category AND t.name = gone.name",
+                    (gone['category'].tolist(), gone['name'].tolist()),
+                )
+
+            if len(delta) or len(gone):
+                bump_catalog_version(cursor, table)
+        connection.commit()
+    except Exception:
+        connection.rollback()
+        raise
+    finally:
+        connection.close()
+
+    inserted_count = int(is_new.sum())
+    return {
+        "inserted_count": inserted_count,
+        "updated_count": len(delta) - inserted_count,
+        "deleted_count": len(gone),
+        "unchanged_count": len(df) - len(delta),
+    }
+
+
+def replace_recipes_category(engine, df, category, table="recipes"):
+    # Rewrites every row of one category from `df` in a single transaction,
+    # without comparing content hashes: readers see either the old or the new
+    # rows, other categories are not touched. Rows missing from `df` are
+    # soft-deleted like in merge_recipes_table, so the Django sync sees them
+    # go. Ingredient edges of the category go with the old rows.
+    df = with_content_hash(df.drop_duplicates(RECIPE_KEY, keep='last'))
+    connection = engine.raw_connection()
+    try:
+        ensure_recipes_table(connection, table)
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT to_regclass('recipe_ingredients') IS NOT NULL")
+            if cursor.fetchone()[0]:
+                cursor.execute(
+                    f"DELETE FROM recipe_ingredients WHERE recipe_id IN (SELECT id FROM {table} WHERE category = %s)",
+                    (category,),
+                )
+            cursor.execute(f"CREATE TEMP TABLE {table}_delta (LIKE {table} INCLUDING DEFAULTS) ON COMMIT DROP")
+            copy_frame(cursor, f"{table}_delta", df)
+            cursor.execute(
+                f"UPDATE {table} AS t SET deleted_at = now(), updated_at = now() "
+                f"WHERE t.category = %s AND t.deleted_at IS NULL AND NOT EXISTS ("
+                f"SELECT 1 FROM {table}_delta AS d WHERE d.category = t.category AND d.name = t.name)",
+                (category,),
+            )
+            deleted_count = cursor.rowcount
+            # xmax is 0 on rows the INSERT created rather than updated
+            cursor.execute(upsert_delta_sql(table) + " RETURNING xmax = 0")
+            inserted_count = sum(1 for (inserted,) in cursor.fetchall() if inserted)
+            bump_catalog_version(cursor, table)
+        connection.commit()
+    except Exception:
+        connection.rollback()
+        raise
+    finally:
+        connection.close()
+
+    return {
+        "inserted_count": inserted_count,
+        "updated_count": len(df) - inserted_count,
+        "deleted_count": deleted_count,
+        "unchanged_count": 0,
+    }
+
+
+def replace_category_ingredients(engine, ingredients, edges, category, table="recipes"):
+    # Adds new canonical ingredients and replaces the ingredient edges of one
+    # category's recipes. An ingredient id always maps to the same name, so
+    # existing ingredients are left alone.
+    connection = engine.raw_connection()
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_xact_lock(hashtext('recipe_ingredients'))")
+            cursor.execute(create_table_sql('ingredients', if_not_exists=True, columns=INGREDIENT_TABLE_COLUMNS))
+            cursor.execute(create_table_sql(
+                'recipe_ingredients', if_not_exists=True,
+                columns=RECIPE_INGREDIENT_TABLE_COLUMNS, constraints=RECIPE_INGREDIENT_CONSTRAINTS,
+            ))
+            create_indexes(cursor, 'recipe_ingredients', RECIPE_INGREDIENT_INDEXES)
+            cursor.execute(f"SELECT to_regclass('{table}') IS NOT NULL")
+            has_recipes = cursor.fetchone()[0]
+        connection.commit()
+
+        with connection.cursor() as cursor:
+            # Inserted in id order, so concurrent partitions adding the same
+            # new ingredients take their row locks in the same order
+            cursor.execute("CREATE TEMP TABLE ingredients_delta (LIKE ingredients) ON COMMIT DROP")
+            copy_frame(cursor, 'ingredients_delta', ingredients, columns=list(INGREDIENT_TABLE_COLUMNS))
+            cursor.execute(
+                "INSERT INTO ingredients SELECT * FROM ingredients_delta ORDER BY id ON CONFLICT (id) DO NOTHING"
+            )
+            inserted_count = cursor.rowcount
+
+            # Edges of the category's stored recipes, and of any recipe in
+            # this parse that is not stored yet
+            if has_recipes:
+                cursor.execute(
+                    f"DELETE FROM recipe_ingredients WHERE recipe_id IN (SELECT id FROM {table} WHERE category = %s)",
+                    (category,),
+                )
+            cursor.execute(
+                "DELETE FROM recipe_ingredients WHERE recipe_id = ANY(%s)",
+                (edges['recipe_id'].unique().tolist(),),
+            )
+            copy_frame(cursor, 'recipe_ingredients', edges, columns=list(RECIPE_INGREDIENT_TABLE_COLUMNS))
+        connection.commit()
+    except Exception:
+        connection.rollback()
+        raise
+    finally:
+        connection.close()
+
+    return {"ingredient_count": len(ingredients), "inserted_ingredient_count": inserted_count, "edge_count": len(edges)}
@@ -0,0 +1,59 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+NUMERIC_COLUMNS = ['calories', 'fat', 'protein', 'carbs', 'fiber', 'sugar']
+
+# Precompiled per-nutrient patterns. The value groups only ever capture
+# well-formed numbers, so the columns can be cast straight to float.
+NUTRITION_PATTERNS = {
+    'calories': re.compile(r"Calories\s*(?P<calories>\d+)"),
+    'fat': re.compile(r"Fat\s*(?P<fat>\d*\.?\d+)g"),
+    'protein': re.compile(r"Protein\s*(?P<protein>\d*\.?\d+)g"),
+    'carbs': re.compile(r"Carbs\s*(?P<carbs>\d*\.?\d+)g"),
+    'fiber': re.compile(r"Fiber\s*(?P<fiber>\d*\.?\d+)g"),
+    'sugar': re.compile(r"Sugar\s*(?P<sugar>\d*\.?\d+)g"),
+}
+
+
+# Allergen vocabulary of UserInputForm.allergens in the Django app, in the
+# same order: bit i of allergen_mask is set when ALLERGENS[i] appears in the
+# ingredients (case-insensitive substring, as the old ILIKE filter did)
+ALLERGENS = ['lactose', 'beef', 'gluten', 'chicken', 'peanuts', 'shellfish', 'soy', 'eggs', 'fish']
+
+
+def allergen_masks(ingredients):
+    lowered = ingredients.str.lower()
+    masks = np.zeros(len(ingredients), dtype='int32')
+    for bit, allergen in enumerate(ALLERGENS):
+        masks |= lowered.str.contains(allergen, regex=False).to_numpy(dtype='int32') << bit
+    return pd.Series(masks, index=ingredients.index)
+
+
+def extract_nutrition(nutrition):
+    nutrition = nutrition.fillna('')
+    return pd.DataFrame(
+        {
+            column: nutrition.str.extract(pattern, expand=False).astype('float64')
+            for column, pattern in NUTRITION_PATTERNS.items()
+        },
+        index=nutrition.index,
+    )
+
+
+def join_lists(series, separator):
+    # A chunk where a field is missing everywhere comes back as float NaNs
+    return series.astype(object).str.join(separator).fillna('')
+
+
+def preprocess_chunk(df):
+    # Flatten the scraped lists and parse nutrition for one chunk of recipes.
+    # The ingredient lines are also kept as lists for the ingredient parser,
+    # since the joined string cannot be split back apart reliably.
+    df['ingredient_lines'] = [lines if isinstance(lines, list) else [] for lines in df['ingredients']]
+    df['ingredients'] = join_lists(df['ingredients'], ', ')
+    df['preparation_steps'] = join_lists(df['preparation_steps'], ' | ')
+    df['allergen_mask'] = allergen_masks(df['ingredients'])
+    df[NUMERIC_COLUMNS] = extract_nutrition(join_lists(df['nutrition'], ', '))
+    return df.drop(columns=['nutrition'])
@@ -0,0 +1,55 @@
+from functools import lru_cache
+
+from dagster import ConfigurableResource
+from pymongo import MongoClient
+from sqlalchemy import create_engine
+from sqlalchemy.engine import URL
+
+
+@lru_cache(maxsize=None)
+def _engine(url, pool_size, max_overflow):
+    # pool_pre_ping swaps out connections the server has dropped since they
+    # were last used, instead of failing the step on them
+    return create_engine(url, pool_size=pool_size, max_overflow=max_overflow, pool_pre_ping=True, pool_recycle=1800)
+
+
+@lru_cache(maxsize=None)
+def _mongo_client(uri, max_pool_size):
+    return MongoClient(uri, maxPoolSize=max_pool_size)
+
+
+class PostgresResource(ConfigurableResource):
+    # The recipes database. Every asset in a process shares one pooled
+    # SQLAlchemy engine per configuration, so runs reuse open connections
+    # instead of connecting for each asset.
+    host: str = "localhost"
+    port: int = 5432
+    database: str = "Recipe"
+    user: str = "postgres"
+    password: str = ""
+    pool_size: int = 5
+    max_overflow: int = 5
+
+    def url(self):
+        return URL.create(
+            "postgresql+psycopg2", username=self.user, password=self.password,
+            host=self.host, port=self.port, database=self.database,
+        ).render_as_string(hide_password=False)
+
+    def get_engine(self):
+        return _engine(self.url(), self.pool_size, self.max_overflow)
+
+
+class MongoResource(ConfigurableResource):
+    # The scraped recipes collection, through one client (and its connection
+    # pool) per process
+    uri: str = "mongodb://localhost:27017/"
+    database: str = "Tasty_Co"
+    collection: str = "Recipes"
+    max_pool_size: int = 20
+
+    def get_database(self):
+        return _mongo_client(self.uri, self.max_pool_size)[self.database]
+
+    def get_collection(self):
+        return self.get_database()[self.collection]
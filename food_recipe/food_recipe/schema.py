@@ -0,0 +1,68 @@
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from food_recipe.preprocess import NUMERIC_COLUMNS
+
+# Few distinct values across thousands of recipes
+CATEGORICAL_COLUMNS = ['category', 'total_time', 'prep_time', 'cook_time']
+
+# Mostly unique text, held in Arrow buffers instead of Python objects
+TEXT_COLUMNS = ['name', 'ingredients', 'preparation_steps']
+
+# "1 hr 10 min" / "25 minutes" / "2 hours" -> minutes
+TIME_PATTERN = r"^(?:(?P<hours>\d+)\s*h(?:ou)?rs?)?\s*(?:(?P<minutes>\d+)\s*min(?:ute)?s?)?"
+
+# Parsed duration column for each scraped time string
+MINUTE_COLUMNS = {
+    'total_time': 'total_minutes',
+    'prep_time': 'prep_minutes',
+    'cook_time': 'cook_minutes',
+}
+
+
+def parse_minutes(times):
+    parts = times.astype('string').str.strip().str.extract(TIME_PATTERN, expand=True).astype('Float64')
+    minutes = parts['hours'].fillna(0) * 60 + parts['minutes'].fillna(0)
+    return minutes.mask(parts.isna().all(axis=1)).astype('Int32')
+
+
+def bytes_per_row(df):
+    return int(df.memory_usage(index=False, deep=True).sum() / max(len(df), 1))
+
+
+def cast_schema(df):
+    # Casts one preprocessed chunk to compact dtypes and adds the minute
+    # columns, so chunks are combined already compact. Missing nutrients are
+    # left for fill_missing_nutrients, since their medians need every chunk.
+    # Columns not listed here are passed through unchanged.
+    columns = {}
+    for column in df.columns:
+        if column in CATEGORICAL_COLUMNS:
+            columns[column] = df[column].astype('category')
+        elif column in TEXT_COLUMNS:
+            columns[column] = df[column].astype('string[pyarrow]')
+        elif column in NUMERIC_COLUMNS:
+            columns[column] = df[column].astype('float32')
+        elif column == 'allergen_mask':
+            columns[column] = df[column].astype('int32')
+        else:
+            columns[column] = df[column]
+    for time_column, minute_column in MINUTE_COLUMNS.items():
+        columns[minute_column] = parse_minutes(df[time_column])
+    return pd.DataFrame(columns, index=df.index)
+
+
+def concat_chunks(chunks):
+    # pd.concat only keeps a categorical column when every chunk has the same
+    # categories, so each chunk is given the union of them first
+    chunks = list(chunks)
+    for column in CATEGORICAL_COLUMNS:
+        categories = union_categoricals([chunk[column] for chunk in chunks]).categories
+        chunks = [chunk.assign(**{column: chunk[column].cat.set_categories(categories)}) for chunk in chunks]
+    return pd.concat(chunks, ignore_index=True)
+
+
+def fill_missing_nutrients(df):
+    # Medians of the whole frame, computed in a single aggregation
+    medians = df[NUMERIC_COLUMNS].median().fillna(0)
+    return df.fillna({column: medians[column] for column in NUMERIC_COLUMNS})
@@ -0,0 +1,52 @@
+from pymongo import ASCENDING, UpdateOne
+
+
+class RecipeWriter:
+    # Buffers scraped recipes and upserts them in unordered bulk_write
+    # batches keyed on (category, name). The unique index makes concurrent
+    # writers safe: a racing insert fails instead of creating a duplicate.
+    def __init__(self, collection, batch_size=500, on_flush=None):
+        self.collection = collection
+        self.batch_size = batch_size
+        self.on_flush = on_flush
+        self.inserted_count = 0
+        self.updated_count = 0
+        self.unchanged_count = 0
+        self._buffer = {}
+
+    def ensure_index(self):
+        self.collection.create_index(
+            [("category", ASCENDING), ("name", ASCENDING)],
+            unique=True,
+            name="category_name_unique",
+        )
+
+    def add(self, recipe_data):
+        # Later copies of the same recipe replace earlier ones in the batch,
+        # since two upserts of one key in a single bulk_write would collide
+        self._buffer[(recipe_data["category"], recipe_data["name"])] = recipe_data
+        if len(self._buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self._buffer:
+            return
+        batch = list(self._buffer.values())
+        operations = [
+            UpdateOne(
+                {"category": recipe_data["category"], "name": recipe_data["name"]},
+                {"$set": recipe_data},
+                upsert=True,
+            )
+            for recipe_data in batch
+        ]
+        result = self.collection.bulk_write(operations, ordered=False)
+        self._buffer = {}
+
+        self.inserted_count += result.upserted_count
+        self.updated_count += result.modified_count
+        self.unchanged_count += result.matched_count - result.modified_count
+        print(f"Flushed {len(batch)} recipes: {result.upserted_count} inserted, {result.modified_count} updated")
+
+        if self.on_flush:
+            self.on_flush(batch)
@@ -0,0 +1,70 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+
+import mongomock
+import pytest
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    # Answers GETs from the server's routes: path -> function taking the
+    # request headers and returning (status, headers, body)
+    def do_GET(self):
+        self.server.requests.append(self.path)
+        route = self.server.routes.get(self.path)
+        status, headers, body = route(self.headers) if route else (404, {}, b"")
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def stub_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.routes = {}
+    server.requests = []
+    server.url = lambda path: f"http://127.0.0.1:{server.server_port}{path}"
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+class MockCollection:
+    # A mongomock collection whose bulk_write takes pymongo 4 UpdateOne
+    # operations, which mongomock's own bulk_write rejects
+    def __init__(self, collection):
+        self.collection = collection
+
+    def __getattr__(self, name):
+        return getattr(self.collection, name)
+
+    def bulk_write(self, operations, ordered=True):
+        counts = SimpleNamespace(upserted_count=0, matched_count=0, modified_count=0)
+        for operation in operations:
+            result = self.collection.update_one(operation._filter, operation._doc, upsert=operation._upsert)
+            counts.upserted_count += result.upserted_id is not None
+            counts.matched_count += result.matched_count
+            counts.modified_count += result.modified_count
+        return counts
+
+
+@pytest.fixture
+def mongo_db():
+    database = mongomock.MongoClient()["Tasty_Co"]
+    return SimpleNamespace(collection=lambda name: MockCollection(database[name]))
+
+
+def recipe_page(name, calories="300 calories"):
+    return (
+        f'<html><body><div class="recipe-page"><h1 class="recipe-name">{name}</h1>'
+        f'<ul class="ingredients__section"><li>1 cup milk</li></ul>'
+        f'<ul class="nutrition-details"><li>{calories}</li></ul></div></body></html>'
+    ).encode()
@@ -1 +1,11 @@
+from dagster import AssetKey
 
+from food_recipe.definitions import defs
+
+
+def test_ingredients_load_after_recipes_load():
+    # Replacing a category's recipes deletes its ingredient edges, so the
+    # edges must be loaded afterwards
+    graph = defs.resolve_asset_graph()
+    parents = graph.get(AssetKey("store_ingredients_in_postgres")).parent_keys
+    assert AssetKey("store_data_in_postgres") in parents
@@ -0,0 +1,120 @@
+import threading
+import time
+
+from food_recipe.fetcher import RecipeFetcher
+from food_recipe.manifest import CrawlManifest
+from food_recipe_tests.conftest import recipe_page
+
+
+def fetcher(concurrency=2, **kwargs):
+    return RecipeFetcher(concurrency=concurrency, per_host_rate=0, backoff=0, **kwargs)
+
+
+def flaky_route(failures, body):
+    # 503 for the first `failures` requests, then the page
+    calls = []
+
+    def route(headers):
+        calls.append(headers)
+        if len(calls) <= failures:
+            return 503, {}, b""
+        return 200, {}, body
+    return route
+
+
+def test_503_is_retried_until_the_page_comes_back(stub_server):
+    stub_server.routes["/r1"] = flaky_route(2, recipe_page("R1"))
+    recipes = list(fetcher(max_retries=3).iter_recipes([("Vegan", stub_server.url("/r1"))]))
+    assert [r["name"] for r in recipes] == ["R1"]
+    assert stub_server.requests == ["/r1"] * 3
+
+
+def test_503_past_the_retries_drops_only_that_recipe(stub_server):
+    stub_server.routes["/down"] = flaky_route(10, recipe_page("Down"))
+    stub_server.routes["/r1"] = flaky_route(0, recipe_page("R1"))
+    jobs = [("Vegan", stub_server.url("/down")), ("Vegan", stub_server.url("/r1"))]
+    recipes = list(fetcher(max_retries=2).iter_recipes(jobs))
+    assert [r["name"] for r in recipes] == ["R1"]
+    assert stub_server.requests.count("/down") == 3
+
+
+def test_304_is_skipped_without_parsing(stub_server, mongo_db):
+    def route(headers):
+        if headers.get("If-None-Match") == '"r1"':
+            return 304, {"ETag": '"r1"'}, b""
+        return 200, {"ETag": '"r1"'}, recipe_page("R1")
+    stub_server.routes["/r1"] = route
+    collection = mongo_db.collection("CrawlManifest")
+    url = stub_server.url("/r1")
+
+    manifest = CrawlManifest(collection, "Vegan")
+    assert [r["name"] for r in fetcher(manifest=manifest).iter_recipes([("Vegan", url)])] == ["R1"]
+    manifest.commit(url)
+    manifest.flush()
+
+    second = fetcher(manifest=CrawlManifest(collection, "Vegan"))
+    assert list(second.iter_recipes([("Vegan", url)])) == []
+    assert second.skipped_count == 1
+
+
+def test_same_body_without_validators_is_skipped_by_hash(stub_server, mongo_db):
+    stub_server.routes["/r1"] = flaky_route(0, recipe_page("R1"))
+    collection = mongo_db.collection("CrawlManifest")
+    url = stub_server.url("/r1")
+
+    manifest = CrawlManifest(collection, "Vegan")
+    list(fetcher(manifest=manifest).iter_recipes([("Vegan", url)]))
+    manifest.commit(url)
+    manifest.flush()
+
+    second = fetcher(manifest=CrawlManifest(collection, "Vegan"))
+    assert list(second.iter_recipes([("Vegan", url)])) == []
+    assert second.skipped_count == 1
+
+    # A changed page is parsed again
+    stub_server.routes["/r1"] = flaky_route(0, recipe_page("R1", "450 calories"))
+    third = fetcher(manifest=CrawlManifest(collection, "Vegan"))
+    assert [r["name"] for r in third.iter_recipes([("Vegan", url)])] == ["R1"]
+    assert third.skipped_count == 0
+
+
+def test_closing_iter_recipes_early_stops_the_fetch_thread(stub_server):
+    for i in range(50):
+        stub_server.routes[f"/r{i}"] = flaky_route(0, recipe_page(f"R{i}"))
+    jobs = [("Vegan", stub_server.url(f"/r{i}")) for i in range(50)]
+
+    recipes = fetcher(concurrency=1).iter_recipes(jobs)
+    next(recipes)
+    # close() returns once the background thread has exited
+    recipes.close()
+    assert not any(t.name == "recipe-fetcher" for t in threading.enumerate())
+    # Fetching stopped well before the end of the jobs
+    assert len(stub_server.requests) < 50
+
+
+def test_fetching_continues_while_the_consumer_is_busy(stub_server, mongo_db):
+    # Six new pages fill the handoff queue (2 * concurrency) while the
+    # consumer sleeps on the first; the unchanged pages after them never
+    # reach the queue, so they are only fetched if the event loop keeps
+    # running while the queue is full
+    collection = mongo_db.collection("CrawlManifest")
+    jobs = []
+    for i in range(40):
+        path = f"/r{i}"
+        url = stub_server.url(path)
+        jobs.append(("Vegan", url))
+        if i < 6:
+            stub_server.routes[path] = flaky_route(0, recipe_page(f"R{i}"))
+        else:
+            stub_server.routes[path] = lambda headers: (304, {}, b"")
+            collection.insert_one({"_id": {"category": "Vegan", "url": url}, "etag": '"e"'})
+
+    recipes = fetcher(manifest=CrawlManifest(collection, "Vegan")).iter_recipes(jobs)
+    first = next(recipes)
+    deadline = time.monotonic() + 5
+    while len(stub_server.requests) < len(jobs) and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert len(stub_server.requests) == len(jobs)
+
+    names = [first["name"]] + [r["name"] for r in recipes]
+    assert sorted(names) == [f"R{i}" for i in range(6)]
@@ -0,0 +1,46 @@
+from food_recipe.fetcher import RecipeFetcher
+from food_recipe.manifest import CrawlManifest
+from food_recipe_tests.conftest import recipe_page
+
+
+def crawl(manifest, category, url):
+    # One crawl as scrape_and_store_recipes runs it: every recipe fetched is
+    # written, then committed to the manifest
+    fetcher = RecipeFetcher(concurrency=2, per_host_rate=0, backoff=0, manifest=manifest)
+    recipes = list(fetcher.iter_recipes([(category, url)]))
+    for recipe_data in recipes:
+        manifest.commit(recipe_data["url"])
+    manifest.flush()
+    return recipes, fetcher.skipped_count
+
+
+def etag_route(body, etag='"r1"'):
+    def route(headers):
+        if headers.get("If-None-Match") == etag:
+            return 304, {"ETag": etag}, b""
+        return 200, {"ETag": etag}, body
+    return route
+
+
+def test_recipe_in_two_categories_is_crawled_for_each(stub_server, mongo_db):
+    stub_server.routes["/r1"] = etag_route(recipe_page("R1"))
+    collection = mongo_db.collection("CrawlManifest")
+    url = stub_server.url("/r1")
+
+    recipes, skipped = crawl(CrawlManifest(collection, "Vegan"), "Vegan", url)
+    assert [(r["category"], r["name"]) for r in recipes] == [("Vegan", "R1")]
+
+    recipes, skipped = crawl(CrawlManifest(collection, "Healthy"), "Healthy", url)
+    assert [(r["category"], r["name"]) for r in recipes] == [("Healthy", "R1")]
+    assert skipped == 0
+
+
+def test_unchanged_recipe_is_skipped_within_its_category(stub_server, mongo_db):
+    stub_server.routes["/r1"] = etag_route(recipe_page("R1"))
+    collection = mongo_db.collection("CrawlManifest")
+    url = stub_server.url("/r1")
+
+    crawl(CrawlManifest(collection, "Vegan"), "Vegan", url)
+    recipes, skipped = crawl(CrawlManifest(collection, "Vegan"), "Vegan", url)
+    assert recipes == []
+    assert skipped == 1
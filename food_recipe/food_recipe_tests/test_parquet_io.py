@@ -0,0 +1,65 @@
+import pandas as pd
+from dagster import AssetKey, PartitionKeyRange, StaticPartitionsDefinition, build_input_context, build_output_context
+
+from food_recipe.parquet_io import ParquetIOManager
+
+KEY = AssetKey("fetch_and_preprocess_data")
+PARTITIONS = StaticPartitionsDefinition(["Healthy", "Vegan"])
+
+
+def recipes(category, names):
+    return pd.DataFrame({
+        'category': pd.Series([category] * len(names), dtype='category'),
+        'name': pd.Series(names, dtype='string[pyarrow]'),
+        'prep_minutes': pd.Series([10, None, 25][:len(names)], dtype='Int32'),
+        'calories': pd.Series([100.5, 200, 300][:len(names)], dtype='float32'),
+        'unit': ['cup', None, 'cup'][:len(names)],
+    })
+
+
+def write(io_manager, partition_key, df):
+    context = build_output_context(asset_key=KEY, partition_key=partition_key)
+    io_manager.handle_output(context, df)
+
+
+def test_partition_round_trip_keeps_the_compact_dtypes(tmp_path):
+    io_manager = ParquetIOManager(base_dir=str(tmp_path))
+    df = recipes("Vegan", ["A", "B", "C"])
+    write(io_manager, "Vegan", df)
+    assert (tmp_path / "fetch_and_preprocess_data" / "category=Vegan" / "data.parquet").exists()
+
+    loaded = io_manager.load_input(build_input_context(asset_key=KEY, partition_key="Vegan"))
+    assert str(loaded['category'].dtype) == 'category'
+    assert str(loaded['name'].dtype) == 'string'
+    assert str(loaded['prep_minutes'].dtype) == 'Int32'
+    assert str(loaded['calories'].dtype) == 'float32'
+    # Plain text stored dictionary-encoded comes back categorical
+    assert str(loaded['unit'].dtype) == 'category'
+    pd.testing.assert_frame_equal(loaded.drop(columns='unit'), df.drop(columns='unit'), check_dtype=False)
+    assert loaded['unit'].isna().tolist() == [False, True, False]
+    assert loaded['unit'].dropna().tolist() == ['cup', 'cup']
+
+
+def test_columns_metadata_limits_what_is_read(tmp_path):
+    io_manager = ParquetIOManager(base_dir=str(tmp_path))
+    write(io_manager, "Vegan", recipes("Vegan", ["A", "B"]))
+
+    context = build_input_context(asset_key=KEY, partition_key="Vegan", definition_metadata={"columns": ["name", "unit"]})
+    loaded = io_manager.load_input(context)
+    assert list(loaded.columns) == ["name", "unit"]
+    assert loaded['name'].tolist() == ["A", "B"]
+
+
+def test_partition_range_is_read_as_one_frame(tmp_path):
+    io_manager = ParquetIOManager(base_dir=str(tmp_path))
+    write(io_manager, "Healthy", recipes("Healthy", ["A"]))
+    write(io_manager, "Vegan", recipes("Vegan", ["B", "C"]))
+
+    context = build_input_context(
+        asset_key=KEY, asset_partitions_def=PARTITIONS,
+        asset_partition_key_range=PartitionKeyRange("Healthy", "Vegan"),
+    )
+    loaded = io_manager.load_input(context)
+    rows = sorted(zip(loaded['category'].astype(str), loaded['name']))
+    assert rows == [("Healthy", "A"), ("Vegan", "B"), ("Vegan", "C")]
+    assert str(loaded['prep_minutes'].dtype) == 'Int32'
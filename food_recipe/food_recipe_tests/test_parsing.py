@@ -0,0 +1,78 @@
+import pandas as pd
+import pytest
+
+from food_recipe.ids import stable_id
+from food_recipe.ingredients import parse_ingredient, parse_recipe_ingredients
+from food_recipe.preprocess import NUMERIC_COLUMNS, extract_nutrition
+from food_recipe.schema import parse_minutes
+
+
+def test_extract_nutrition_reads_each_nutrient():
+    nutrition = pd.Series(
+        ["Calories 300, Fat 12g, Protein 4.5g, Carbs .5g, Fiber 2g, Sugar 10g", "Calories 120", None],
+        index=[7, 8, 9],
+    )
+    df = extract_nutrition(nutrition)
+    assert list(df.columns) == NUMERIC_COLUMNS
+    assert list(df.index) == [7, 8, 9]
+    assert df.loc[7].tolist() == [300.0, 12.0, 4.5, 0.5, 2.0, 10.0]
+    assert df.loc[8, 'calories'] == 120.0
+    assert df.loc[8, ['fat', 'protein', 'carbs', 'fiber', 'sugar']].isna().all()
+    assert df.loc[9].isna().all()
+    assert (df.dtypes == 'float64').all()
+
+
+@pytest.mark.parametrize("line, expected", [
+    ("1 ½ cups milk, warmed", (1.5, "cup", "milk")),
+    ("1/2 teaspoon kosher salt", (0.5, "teaspoon", "salt")),
+    ("3 tbsp. olive oil", (3.0, "tablespoon", "olive oil")),
+    ("2-3 large eggs", (2.0, None, "egg")),
+    ("1 (15 ounce) can black beans, drained", (1.0, "can", "black bean")),
+    ("1 large head lettuce", (1.0, "head", "lettuce")),
+    ("4 tomatoes, chopped", (4.0, None, "tomato")),
+    ("salt and pepper, to taste", (None, None, "salt and pepper")),
+    ("2 c flour", (2.0, "cup", "flour")),
+    # A bare one-letter unit needs a quantity before it
+    ("c flour", (None, None, "c flour")),
+])
+def test_parse_ingredient(line, expected):
+    assert parse_ingredient(line) == expected
+
+
+def test_parse_minutes():
+    times = pd.Series(["1 hr 10 min", "25 minutes", "2 hours", "1 hour", "", None, "overnight"])
+    minutes = parse_minutes(times)
+    assert str(minutes.dtype) == 'Int32'
+    assert minutes[:4].tolist() == [70, 25, 120, 60]
+    # Blank, missing and unparseable times stay missing rather than 0
+    assert minutes[4:].isna().all()
+
+
+def test_parse_recipe_ingredients_builds_one_edge_per_canonical_ingredient():
+    df = pd.DataFrame({
+        'category': ['Vegan', 'Vegan'],
+        'name': ['Porridge', 'Tea'],
+        'ingredient_lines': [
+            ['1 cup milk', '2 tbsp Milk, warmed', '(optional)', '1/2 cup oats', 'salt'],
+            ['1 cup milk', ''],
+        ],
+    })
+    ingredients, edges = parse_recipe_ingredients(df)
+
+    # One row per canonical name, shared by both recipes
+    assert dict(zip(ingredients['name'], ingredients['id'])) == {
+        name: stable_id(name) for name in ['milk', 'oat', 'salt']
+    }
+
+    porridge = edges[edges['recipe_id'] == stable_id('Vegan', 'Porridge')]
+    # The second milk line collapses into the first, lines with no name are
+    # dropped, and positions stay consecutive
+    assert porridge['ingredient_id'].tolist() == [stable_id('milk'), stable_id('oat'), stable_id('salt')]
+    assert porridge['position'].tolist() == [0, 1, 2]
+    assert porridge['quantity'].tolist()[:2] == [1.0, 0.5]
+    assert porridge['unit'].tolist()[:2] == ['cup', 'cup']
+    assert porridge['unit'].isna().tolist()[2]
+
+    tea = edges[edges['recipe_id'] == stable_id('Vegan', 'Tea')]
+    assert tea['ingredient_id'].tolist() == [stable_id('milk')]
+    assert tea['position'].tolist() == [0]
@@ -0,0 +1,204 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine
+
+from food_recipe.ids import stable_id
+from food_recipe.ingredients import parse_recipe_ingredients
+from food_recipe.postgres import (
+    RECIPE_ID_SQL, RECIPE_TABLE_COLUMNS, merge_recipes_table, replace_category_ingredients, replace_recipes_category,
+)
+from food_recipe.resources import PostgresResource
+
+# Runs against a real server only when one is configured, as for the assets
+pytestmark = pytest.mark.skipif("RECIPE_DB_HOST" not in os.environ, reason="RECIPE_DB_HOST not set")
+
+TABLE = "recipes_merge_test"
+
+# The ingredient tables have fixed names, so tests writing them run in a
+# scratch schema instead of next to the real ones
+SCHEMA = "food_recipe_test"
+
+
+def postgres():
+    return PostgresResource(
+        host=os.environ["RECIPE_DB_HOST"],
+        port=int(os.getenv("RECIPE_DB_PORT", "5432")),
+        database=os.getenv("RECIPE_DB_NAME", "Recipe"),
+        user=os.getenv("RECIPE_DB_USER", "postgres"),
+        password=os.getenv("RECIPE_DB_PASSWORD", ""),
+    )
+
+
+@pytest.fixture
+def engine():
+    engine = postgres().get_engine()
+    drop = f"DROP TABLE IF EXISTS {TABLE}, {TABLE}_catalog_version, {TABLE}_delta"
+    with engine.begin() as connection:
+        connection.exec_driver_sql(drop)
+    yield engine
+    with engine.begin() as connection:
+        connection.exec_driver_sql(drop)
+
+
+@pytest.fixture
+def scratch_engine():
+    engine = create_engine(postgres().url(), connect_args={"options": f"-c search_path={SCHEMA}"})
+    with engine.begin() as connection:
+        connection.exec_driver_sql(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+        connection.exec_driver_sql(f"CREATE SCHEMA {SCHEMA}")
+    yield engine
+    with engine.begin() as connection:
+        connection.exec_driver_sql(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+    engine.dispose()
+
+
+def recipes(category, *rows):
+    # (name, calories) pairs as a preprocessed frame of one category
+    df = pd.DataFrame({column: [None] * len(rows) for column in RECIPE_TABLE_COLUMNS if column != 'id'})
+    df['category'] = category
+    df['name'] = [name for name, _ in rows]
+    df['calories'] = [float(calories) for _, calories in rows]
+    df['ingredients'] = 'salt, pepper'
+    df['allergen_mask'] = 0
+    return df
+
+
+def live_rows(engine):
+    with engine.connect() as connection:
+        return dict(connection.exec_driver_sql(
+            f"SELECT category || '/' || name, calories FROM {TABLE} WHERE deleted_at IS NULL"
+        ).fetchall())
+
+
+def test_merge_counts_inserts_updates_deletes_and_unchanged_rows(engine):
+    counts = merge_recipes_table(engine, recipes("Vegan", ("A", 100), ("B", 200), ("C", 300)), TABLE, "Vegan")
+    assert counts == {"inserted_count": 3, "updated_count": 0, "deleted_count": 0, "unchanged_count": 0}
+
+    # A unchanged, B changed, C gone, D new
+    counts = merge_recipes_table(engine, recipes("Vegan", ("A", 100), ("B", 250), ("D", 400)), TABLE, "Vegan")
+    assert counts == {"inserted_count": 1, "updated_count": 1, "deleted_count": 1, "unchanged_count": 1}
+    assert live_rows(engine) == {"Vegan/A": 100, "Vegan/B": 250, "Vegan/D": 400}
+
+    # A soft-deleted row coming back counts as an update, not an insert
+    counts = merge_recipes_table(engine, recipes("Vegan", ("A", 100), ("B", 250), ("C", 300), ("D", 400)), TABLE, "Vegan")
+    assert counts == {"inserted_count": 0, "updated_count": 1, "deleted_count": 0, "unchanged_count": 3}
+
+
+def test_merge_of_one_category_leaves_the_others_alone(engine):
+    merge_recipes_table(engine, recipes("Vegan", ("A", 100)), TABLE, "Vegan")
+    counts = merge_recipes_table(engine, recipes("Healthy", ("A", 150)), TABLE, "Healthy")
+    assert counts == {"inserted_count": 1, "updated_count": 0, "deleted_count": 0, "unchanged_count": 0}
+    assert live_rows(engine) == {"Vegan/A": 100, "Healthy/A": 150}
+
+
+def test_load_drops_the_unused_ingredients_gin_index(engine):
+    merge_recipes_table(engine, recipes("Vegan", ("A", 100)), TABLE, "Vegan")
+    with engine.begin() as connection:
+        connection.exec_driver_sql(
+            f"CREATE INDEX {TABLE}_ingredients_gin_idx ON {TABLE} USING gin (string_to_array(lower(ingredients), ', '))"
+        )
+    merge_recipes_table(engine, recipes("Vegan", ("A", 100)), TABLE, "Vegan")
+    with engine.connect() as connection:
+        indexes = {row[0] for row in connection.exec_driver_sql(
+            "SELECT indexname FROM pg_indexes WHERE tablename = %s", (TABLE,)
+        )}
+    assert f"{TABLE}_ingredients_gin_idx" not in indexes
+    assert f"{TABLE}_category_calories_idx" in indexes
+
+
+def test_concurrent_first_loads_of_different_categories(engine):
+    # Partitions load in parallel; the first loads all create the table
+    # and its catalog version table
+    categories = ["Vegan", "Healthy", "Low Carb", "Snacks", "Vegetarian", "High Protein"]
+    with ThreadPoolExecutor(len(categories)) as pool:
+        results = list(pool.map(
+            lambda category: merge_recipes_table(engine, recipes(category, ("A", 100)), TABLE, category),
+            categories,
+        ))
+    assert all(counts["inserted_count"] == 1 for counts in results)
+    assert len(live_rows(engine)) == len(categories)
+    with engine.connect() as connection:
+        version = connection.exec_driver_sql(f"SELECT version FROM {TABLE}_catalog_version").scalar()
+    assert version == len(categories)
+
+
+def test_replace_soft_deletes_recipes_missing_from_the_load(engine):
+    counts = replace_recipes_category(engine, recipes("Vegan", ("A", 100), ("B", 200), ("C", 300)), "Vegan", TABLE)
+    assert counts == {"inserted_count": 3, "updated_count": 0, "deleted_count": 0, "unchanged_count": 0}
+    replace_recipes_category(engine, recipes("Healthy", ("C", 300)), "Healthy", TABLE)
+
+    counts = replace_recipes_category(engine, recipes("Vegan", ("A", 100), ("B", 250), ("D", 400)), "Vegan", TABLE)
+    assert counts == {"inserted_count": 1, "updated_count": 2, "deleted_count": 1, "unchanged_count": 0}
+    assert live_rows(engine) == {"Vegan/A": 100, "Vegan/B": 250, "Vegan/D": 400, "Healthy/C": 300}
+    # C stays behind as a tombstone the Django sync can see
+    with engine.connect() as connection:
+        tombstones = connection.exec_driver_sql(
+            f"SELECT category || '/' || name FROM {TABLE} WHERE deleted_at IS NOT NULL"
+        ).fetchall()
+    assert tombstones == [("Vegan/C",)]
+
+
+def test_recipe_ids_computed_in_sql_match_stable_id(engine):
+    # Ids of existing rows are backfilled in SQL, new rows and ingredient
+    # edges get them from Python; they must agree for edges to join
+    keys = [
+        ("Vegan", "Lentil Soup"),
+        ("Low Carb", "Crème Brûlée"),
+        ("Healthy", "Mapo Tofu 麻婆豆腐"),
+        ("Snacks", "Spicy 🌶 Nuts"),
+        ("High Protein", ""),
+    ]
+    connection = engine.raw_connection()
+    try:
+        # md5() hashes the UTF-8 bytes even on a SQL_ASCII server
+        connection.set_client_encoding('UTF8')
+        with connection.cursor() as cursor:
+            sql_ids = []
+            for key in keys:
+                cursor.execute(f"SELECT {RECIPE_ID_SQL} FROM (VALUES (%s, %s)) AS key(category, name)", key)
+                sql_ids.append(cursor.fetchone()[0])
+    finally:
+        connection.close()
+    assert sql_ids == [stable_id(category, name) for category, name in keys]
+
+
+def store_with_ingredients(engine, category, lines_by_name):
+    df = recipes(category, *[(name, 100) for name in lines_by_name])
+    replace_recipes_category(engine, df, category)
+    ingredients, edges = parse_recipe_ingredients(df.assign(ingredient_lines=list(lines_by_name.values())))
+    return replace_category_ingredients(engine, ingredients, edges, category)
+
+
+def stored_edges(engine):
+    # Ingredient names per recipe, in position order, joined through the ids
+    with engine.connect() as connection:
+        rows = connection.exec_driver_sql(
+            "SELECT r.category || '/' || r.name, i.name FROM recipe_ingredients AS e "
+            "JOIN recipes AS r ON r.id = e.recipe_id JOIN ingredients AS i ON i.id = e.ingredient_id "
+            "ORDER BY r.category, r.name, e.position"
+        ).fetchall()
+    edges = {}
+    for recipe, ingredient in rows:
+        edges.setdefault(recipe, []).append(ingredient)
+    return edges
+
+
+def test_ingredient_edges_are_replaced_per_category(scratch_engine):
+    counts = store_with_ingredients(scratch_engine, "Vegan", {"Porridge": ["1 cup milk", "2 tbsp milk", "1/2 cup oats"]})
+    assert counts == {"ingredient_count": 2, "inserted_ingredient_count": 2, "edge_count": 2}
+    store_with_ingredients(scratch_engine, "Healthy", {"Salad": ["1 head lettuce", "salt"]})
+
+    counts = store_with_ingredients(scratch_engine, "Vegan", {
+        "Porridge": ["1/2 cup oats", "1 tbsp honey"],
+        "Tea": ["1 cup milk"],
+    })
+    # milk and oat are already stored
+    assert counts == {"ingredient_count": 3, "inserted_ingredient_count": 1, "edge_count": 3}
+    assert stored_edges(scratch_engine) == {
+        "Healthy/Salad": ["lettuce", "salt"],
+        "Vegan/Porridge": ["oat", "honey"],
+        "Vegan/Tea": ["milk"],
+    }
@@ -0,0 +1,35 @@
+import pandas as pd
+
+from food_recipe.preprocess import preprocess_chunk
+from food_recipe.schema import cast_schema, concat_chunks, fill_missing_nutrients
+
+
+def raw_chunk(names, prep_time, nutrition):
+    return pd.DataFrame({
+        'category': 'Vegan',
+        'name': names,
+        'total_time': '1 hr',
+        'prep_time': prep_time,
+        'cook_time': '5 min',
+        'ingredients': [['1 cup milk', 'salt']] * len(names),
+        'preparation_steps': [['Mix.']] * len(names),
+        'nutrition': nutrition,
+    })
+
+
+def test_chunks_stay_compact_and_missing_nutrients_get_the_category_median():
+    chunks = [
+        cast_schema(preprocess_chunk(raw_chunk(['A', 'B'], '10 min', [['Calories 100'], ['Calories 200']]))),
+        cast_schema(preprocess_chunk(raw_chunk(['C', 'D'], '20 min', [['Calories 600'], []]))),
+    ]
+    df = fill_missing_nutrients(concat_chunks(chunks))
+
+    # Categories differ between the chunks, and the column is still categorical
+    assert str(df['prep_time'].dtype) == 'category'
+    assert str(df['name'].dtype) == 'string'
+    assert str(df['calories'].dtype) == 'float32'
+    assert df['prep_minutes'].tolist() == [10, 10, 20, 20]
+    # D has no calories: the median of A, B and C, not of its own chunk
+    assert df['calories'].tolist() == [100, 200, 600, 200]
+    # No fat anywhere: filled with 0
+    assert (df['fat'] == 0).all()
@@ -4,8 +4,8 @@ setup(
     name="food_recipe",
     packages=find_packages(exclude=["food_recipe_tests"]),
     install_requires=[
-        "dagster",
+        "dagster>=1.8",
         "dagster-cloud"
     ],
-    extras_require={"dev": ["dagster-webserver", "pytest"]},
+    extras_require={"dev": ["dagster-webserver", "pytest", "mongomock"]},
 )
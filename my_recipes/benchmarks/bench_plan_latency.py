@@ -0,0 +1,123 @@
+"""Measure weekly plan latency (p50/p99) for the old per-meal queries and the planner.
+
+The planner is measured both with the filtered category fetched by one
+indexed query and with candidates served from the in-process catalog
+cache.
+
+Runs against the database configured in my_recipes.settings:
+
+    python benchmarks/bench_plan_latency.py --plans 200
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "my_recipes.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.db import connection  # noqa: E402
+
+import numpy as np  # noqa: E402
+
+from benchmarks.calorie_greedy import plan_week  # noqa: E402
+from meal_recommendation.catalog import allergen_mask, get_catalog  # noqa: E402
+from meal_recommendation.planner import MEAL_SPLIT, calculate_daily_calories, fetch_candidates  # noqa: E402
+
+CATEGORIES = ['Healthy', 'Vegetarian', 'Low Carb', 'High Protein', 'Vegan']
+ALLERGENS = ['lactose', 'beef', 'gluten', 'chicken', 'peanuts', 'shellfish', 'soy', 'eggs', 'fish']
+
+
+def plan_week_per_meal(category, allergens, daily_calories):
+    # The original view: one ORDER BY ABS(calories - target) query per day and meal
+    used_recipes = set()
+    weekly_plan = {}
+    for day in range(7):
+        day_plan = {}
+        for meal, share in MEAL_SPLIT.items():
+            with connection.cursor() as cursor:
+                cursor.execute("""
+                    SELECT name, calories, category, prep_time, cook_time, ingredients, protein, fat, carbs
+                    FROM recipes
+                    WHERE category = %s
+                    AND calories IS NOT NULL
+                    AND deleted_at IS NULL
+                    AND NOT EXISTS (
+                        SELECT 1 FROM unnest(string_to_array(ingredients, ', ')) AS ing
+                        WHERE ing ILIKE ANY (ARRAY[%s])
+                    )
+                    AND name NOT IN %s
+                    ORDER BY ABS(calories - %s)
+                    LIMIT 1
+                """, [
+                    category,
+                    [f"%{allergen}%" for allergen in allergens],
+                    tuple(used_recipes) if used_recipes else ('dummy_recipe',),
+                    share * daily_calories,
+                ])
+                result = cursor.fetchone()
+            day_plan[meal] = result
+            if result:
+                used_recipes.add(result[0])
+        weekly_plan[f"Day {day + 1}"] = day_plan
+    return weekly_plan
+
+
+def plan_week_database(category, allergens, daily_calories):
+    candidates = fetch_candidates(category, allergens)
+    calories = np.array([recipe['calories'] for recipe in candidates], dtype=np.float64)
+    return plan_week(candidates, calories, daily_calories)
+
+
+def plan_week_catalog(category, allergens, daily_calories):
+    candidates, nutrients = get_catalog().category(category).select(allergen_mask(allergens))
+    return plan_week(candidates, nutrients[:, 0], daily_calories)
+
+
+def random_profile(rng):
+    return {
+        'category': rng.choice(CATEGORIES),
+        'allergens': rng.sample(ALLERGENS, rng.randint(0, 2)),
+        'daily_calories': calculate_daily_calories(
+            rng.randint(18, 80), rng.randint(150, 200), rng.randint(45, 130), rng.choice('MF'),
+            rng.choice(['sedentary', 'light', 'moderate', 'active', 'very_active']),
+            rng.choice(['lose', 'maintain', 'gain']),
+        ),
+    }
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def main(plans, seed):
+    profiles = [random_profile(random.Random(seed + i)) for i in range(plans)]
+    print(f"{'planner':<14}{'p50 ms':>10}{'p99 ms':>10}")
+    get_catalog()  # warm the cache so only steady-state requests are timed
+    planners = [
+        ("per-meal", plan_week_per_meal),
+        ("database", plan_week_database),
+        ("catalog", plan_week_catalog),
+    ]
+    for name, plan in planners:
+        samples = []
+        for profile in profiles:
+            start = time.perf_counter()
+            plan(**profile)
+            samples.append((time.perf_counter() - start) * 1000)
+        print(f"{name:<14}{percentile(samples, 0.5):>10.2f}{percentile(samples, 0.99):>10.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--plans", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    main(args.plans, args.seed)
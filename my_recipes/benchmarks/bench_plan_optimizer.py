@@ -0,0 +1,110 @@
+"""Plan weeks for thousands of synthetic user profiles with each planner.
+
+Compares the calorie-only greedy planner with the macro-aware optimizer,
+solved both exactly and greedily, on a synthetic in-memory catalog, so no
+database is needed. Reports latency (p50/p99) and the plan quality: the mean
+relative miss per slot on calories and on each macro.
+
+    python benchmarks/bench_plan_optimizer.py --profiles 5000 --recipes 3000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "my_recipes.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+import numpy as np  # noqa: E402
+
+from benchmarks.calorie_greedy import plan_week  # noqa: E402
+from meal_recommendation.catalog import NUTRIENT_FIELDS, CategoryCatalog  # noqa: E402
+from meal_recommendation.planner import (  # noqa: E402
+    MACRO_SPLIT, MEAL_SPLIT, calculate_daily_calories, nutrient_targets, optimize_week,
+)
+
+
+def make_catalog(recipes, seed):
+    # Recipes from 50 to 1200 kcal with their calories spread over protein,
+    # fat and carbs at random, sorted by calories like the real catalog
+    rng = np.random.default_rng(seed)
+    calories = np.sort(rng.uniform(50, 1200, recipes))
+    shares = rng.dirichlet([2.0, 2.0, 3.0], recipes)
+    grams = calories[:, None] * shares / np.array([4.0, 9.0, 4.0])
+    rows = [
+        {
+            'name': f"recipe {i}", 'calories': float(calories[i]), 'category': 'Healthy',
+            'prep_time': None, 'cook_time': None, 'prep_minutes': None, 'ingredients': '',
+            'protein': float(grams[i, 0]), 'fat': float(grams[i, 1]), 'carbs': float(grams[i, 2]),
+        }
+        for i in range(recipes)
+    ]
+    return CategoryCatalog(rows, [0] * recipes)
+
+
+def random_profile(rng):
+    fitness_goals = rng.choice(list(MACRO_SPLIT))
+    return {
+        'daily_calories': calculate_daily_calories(
+            rng.randint(18, 80), rng.randint(150, 200), rng.randint(45, 130), rng.choice('MF'),
+            rng.choice(['sedentary', 'light', 'moderate', 'active', 'very_active']),
+            fitness_goals,
+        ),
+        'fitness_goals': fitness_goals,
+    }
+
+
+def plan_miss(weekly_plan, daily_calories, fitness_goals):
+    # Mean relative miss per filled slot for each of NUTRIENT_FIELDS
+    targets = dict(zip(MEAL_SPLIT, nutrient_targets(daily_calories, fitness_goals)))
+    misses = [
+        np.abs(np.array([recipe[field] for field in NUTRIENT_FIELDS]) - targets[meal]) / targets[meal]
+        for day_plan in weekly_plan.values()
+        for meal, recipe in day_plan.items()
+        if recipe is not None
+    ]
+    return np.mean(misses, axis=0)
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def main(profiles, recipes, seed):
+    catalog = make_catalog(recipes, seed)
+    candidates, nutrients = catalog.select(0)
+    users = [random_profile(random.Random(seed + i)) for i in range(profiles)]
+    planners = [
+        ("calorie-greedy", lambda user: plan_week(candidates, nutrients[:, 0], user['daily_calories'])),
+        ("macro-greedy", lambda user: optimize_week(candidates, nutrients, budget_ms=0, **user)),
+        ("macro-optimal", lambda user: optimize_week(candidates, nutrients, **user)),
+    ]
+
+    header = ''.join(f"{field + ' miss':>15}" for field in NUTRIENT_FIELDS)
+    print(f"{'planner':<16}{'p50 ms':>10}{'p99 ms':>10}{header}")
+    for name, plan in planners:
+        samples = []
+        misses = []
+        for user in users:
+            start = time.perf_counter()
+            weekly_plan = plan(user)
+            samples.append((time.perf_counter() - start) * 1000)
+            misses.append(plan_miss(weekly_plan, **user))
+        row = ''.join(f"{miss:>15.3f}" for miss in np.mean(misses, axis=0))
+        print(f"{name:<16}{percentile(samples, 0.5):>10.2f}{percentile(samples, 0.99):>10.2f}{row}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--profiles", type=int, default=5000)
+    parser.add_argument("--recipes", type=int, default=3000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    main(args.profiles, args.recipes, args.seed)
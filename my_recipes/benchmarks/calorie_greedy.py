@@ -0,0 +1,46 @@
+"""The calorie-only greedy planner the meal planner used before the macro
+optimizer, kept as the baseline the benchmarks and tests compare against."""
+
+import numpy as np
+
+from meal_recommendation.planner import DAYS, MEAL_SPLIT
+
+
+def plan_week(candidates, calories, daily_calories):
+    # Assigns each day and meal the unused recipe closest to its calorie
+    # target, in the same day-by-day order as before. `candidates` must be
+    # sorted by calories; a recipe name is never served twice in a week.
+    taken = [False] * len(candidates)
+    positions_by_name = {}
+    for position, recipe in enumerate(candidates):
+        positions_by_name.setdefault(recipe['name'], []).append(position)
+
+    weekly_plan = {}
+    for day in range(DAYS):
+        day_plan = {}
+        for meal, share in MEAL_SPLIT.items():
+            position = _nearest_untaken(calories, taken, share * daily_calories)
+            if position is None:
+                day_plan[meal] = None  # No recipe available
+                continue
+            recipe = candidates[position]
+            for same_name in positions_by_name[recipe['name']]:
+                taken[same_name] = True
+            day_plan[meal] = dict(recipe)
+        weekly_plan[f"Day {day + 1}"] = day_plan
+    return weekly_plan
+
+
+def _nearest_untaken(calories, taken, target):
+    right = int(np.searchsorted(calories, target))
+    left = right - 1
+    while left >= 0 and taken[left]:
+        left -= 1
+    while right < len(calories) and taken[right]:
+        right += 1
+
+    if left < 0:
+        return right if right < len(calories) else None
+    if right >= len(calories):
+        return left
+    return left if target - calories[left] <= calories[right] - target else right
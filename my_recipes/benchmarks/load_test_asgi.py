@@ -0,0 +1,137 @@
+"""Load-test the sync and async meal plan API under a local ASGI server.
+
+Starts my_recipes.asgi under uvicorn, then for each level of concurrent
+users keeps that many clients posting random profiles to the sync
+(/api/meal-plan/) and the async (/api/meal-plan/async/) endpoint for a
+fixed time. Reports throughput and p50/p99 latency per endpoint and level.
+Needs uvicorn and aiohttp, and the database configured in
+my_recipes.settings:
+
+    python benchmarks/load_test_asgi.py --users 50 100 200 500 --seconds 10
+"""
+import argparse
+import asyncio
+import random
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import aiohttp
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent
+
+ENDPOINTS = [
+    ("sync", "/api/meal-plan/"),
+    ("async", "/api/meal-plan/async/"),
+]
+CATEGORIES = ['Healthy', 'Vegetarian', 'Low Carb', 'High Protein', 'Vegan']
+ALLERGENS = ['lactose', 'beef', 'gluten', 'chicken', 'peanuts', 'shellfish', 'soy', 'eggs', 'fish']
+
+
+def random_profile(rng):
+    return {
+        'age': rng.randint(18, 80),
+        'height': rng.randint(150, 200),
+        'weight': rng.randint(45, 130),
+        'gender': rng.choice('MF'),
+        'activity_level': rng.choice(['sedentary', 'light', 'moderate', 'active', 'very_active']),
+        'fitness_goals': rng.choice(['lose', 'maintain', 'gain']),
+        'dietary_preference': rng.choice(CATEGORIES),
+        'allergens': rng.sample(ALLERGENS, rng.randint(0, 2)),
+    }
+
+
+def start_server(port):
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "my_recipes.asgi:application",
+         "--port", str(port), "--log-level", "warning", "--no-access-log"],
+        cwd=PROJECT_DIR,
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return server
+        except OSError:
+            time.sleep(0.2)
+    server.terminate()
+    raise RuntimeError("uvicorn did not start")
+
+
+async def run_level(base_url, path, users, seconds, profiles):
+    latencies = []
+    errors = 0
+
+    async def user(session, rng):
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                async with session.post(base_url + path, json=rng.choice(profiles)) as response:
+                    await response.read()
+                    ok = response.status == 200
+            except aiohttp.ClientError:
+                ok = False
+            if ok:
+                latencies.append((time.perf_counter() - start) * 1000)
+            else:
+                errors += 1
+
+    connector = aiohttp.TCPConnector(limit=users)
+    timeout = aiohttp.ClientTimeout(total=60)
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        start = time.perf_counter()
+        deadline = start + seconds
+        await asyncio.gather(*(user(session, random.Random(i)) for i in range(users)))
+        # Requests still in flight at the deadline are waited for and counted
+        elapsed = time.perf_counter() - start
+    return latencies, errors, elapsed
+
+
+def percentile(samples, fraction):
+    if not samples:
+        return float('nan')
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+async def main(users_levels, seconds, distinct_profiles, port, seed):
+    rng = random.Random(seed)
+    profiles = [random_profile(rng) for _ in range(distinct_profiles)]
+    base_url = f"http://127.0.0.1:{port}"
+
+    # One pass over every profile first, so the catalog and the plan cache
+    # are equally warm for both endpoints
+    async with aiohttp.ClientSession() as session:
+        for profile in profiles:
+            async with session.post(base_url + ENDPOINTS[0][1], json=profile) as response:
+                await response.read()
+
+    print(f"{'endpoint':<10}{'users':>7}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'errors':>8}")
+    for users in users_levels:
+        for name, path in ENDPOINTS:
+            latencies, errors, elapsed = await run_level(base_url, path, users, seconds, profiles)
+            print(
+                f"{name:<10}{users:>7}{len(latencies) / elapsed:>10.1f}"
+                f"{percentile(latencies, 0.5):>10.1f}{percentile(latencies, 0.99):>10.1f}{errors:>8}"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, nargs="+", default=[50, 100, 200, 500])
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--profiles", type=int, default=2000,
+                        help="distinct profiles posted; more of them means more plan cache misses")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    server = start_server(args.port)
+    try:
+        asyncio.run(main(args.users, args.seconds, args.profiles, args.port, args.seed))
+    finally:
+        server.terminate()
+        server.wait()
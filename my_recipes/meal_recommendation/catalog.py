@@ -0,0 +1,146 @@
+import threading
+import time
+
+import numpy as np
+from django.conf import settings
+from django.db import DatabaseError, connection
+
+from .forms import UserInputForm
+
+RECIPE_FIELDS = [
+    'name', 'calories', 'category', 'prep_time', 'cook_time', 'prep_minutes',
+    'ingredients', 'protein', 'fat', 'carbs',
+]
+
+# Columns of the nutrient matrix the planner scores candidates on
+NUTRIENT_FIELDS = ['calories', 'protein', 'fat', 'carbs']
+
+# One bit per allergen choice on UserInputForm, in declaration order. The ETL
+# writes the matching bitmask into recipes.allergen_mask. "other" has no bit:
+# custom allergens are searched in the ingredients text instead.
+ALLERGEN_BITS = {
+    value: 1 << bit
+    for bit, (value, _) in enumerate(UserInputForm.base_fields['allergens'].choices)
+    if value != 'other'
+}
+
+CATALOG_QUERY = f"""
+    SELECT {', '.join(RECIPE_FIELDS)}, allergen_mask
+    FROM recipes
+    WHERE calories IS NOT NULL
+    AND deleted_at IS NULL
+    ORDER BY category, calories, name
+"""
+
+VERSION_QUERY = "SELECT version FROM recipes_catalog_version"
+
+
+def allergen_mask(allergens):
+    mask = 0
+    for allergen in allergens:
+        mask |= ALLERGEN_BITS.get(allergen, 0)
+    return mask
+
+
+class CategoryCatalog:
+    # The recipes of one category, sorted by calories and name, with a row of
+    # NUTRIENT_FIELDS values per recipe and the allergen bitmasks as parallel
+    # NumPy arrays. Missing nutrient values are NaN.
+    def __init__(self, recipes, allergen_masks):
+        self.recipes = recipes
+        self.nutrients = np.array(
+            [[recipe[field] for field in NUTRIENT_FIELDS] for recipe in recipes], dtype=np.float64,
+        ).reshape(len(recipes), len(NUTRIENT_FIELDS))
+        self.calories = self.nutrients[:, 0]
+        self.allergen_masks = np.array(allergen_masks, dtype=np.int64)
+        # NaN where the prep time is unknown, which never fits a time budget
+        self.prep_minutes = np.array(
+            [np.nan if recipe['prep_minutes'] is None else recipe['prep_minutes'] for recipe in recipes],
+            dtype=np.float64,
+        )
+
+    def select(self, mask, excluded_names=frozenset(), max_prep_minutes=None):
+        # Recipes free of every allergen in `mask`, not named in
+        # `excluded_names` and ready within `max_prep_minutes`, still sorted
+        # by calories, with their rows of the nutrient matrix
+        if not mask and not excluded_names and max_prep_minutes is None:
+            return self.recipes, self.nutrients
+        keep = (self.allergen_masks & mask) == 0
+        if max_prep_minutes is not None:
+            keep &= self.prep_minutes <= max_prep_minutes
+        if excluded_names:
+            keep &= np.array([recipe['name'] not in excluded_names for recipe in self.recipes], dtype=bool)
+        return [self.recipes[position] for position in np.flatnonzero(keep)], self.nutrients[keep]
+
+
+class RecipeCatalog:
+    def __init__(self, version, rows):
+        # `rows` are RECIPE_FIELDS values followed by the allergen mask
+        self.version = version
+        by_category = {}
+        for row in rows:
+            recipe = dict(zip(RECIPE_FIELDS, row))
+            recipes, masks = by_category.setdefault(recipe['category'], ([], []))
+            recipes.append(recipe)
+            masks.append(row[-1] or 0)
+        self.categories = {
+            category: CategoryCatalog(recipes, masks) for category, (recipes, masks) in by_category.items()
+        }
+        self._empty = CategoryCatalog([], [])
+
+    @classmethod
+    def load(cls, version):
+        with connection.cursor() as cursor:
+            cursor.execute(CATALOG_QUERY)
+            return cls(version, cursor.fetchall())
+
+    def category(self, category):
+        return self.categories.get(category, self._empty)
+
+
+_lock = threading.Lock()
+_catalog = None
+_checked_at = 0.0
+
+
+def read_catalog_version():
+    # None when the ETL has not written a version stamp yet
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(VERSION_QUERY)
+            row = cursor.fetchone()
+    except DatabaseError:
+        return None
+    return row[0] if row else None
+
+
+def get_catalog():
+    # Returns the process-wide catalog, re-reading the ETL's version stamp at
+    # most every MEAL_CATALOG_VERSION_CHECK_SECONDS and reloading on change
+    global _catalog, _checked_at
+    interval = getattr(settings, 'MEAL_CATALOG_VERSION_CHECK_SECONDS', 30)
+    if _catalog is not None and time.monotonic() - _checked_at < interval:
+        return _catalog
+
+    with _lock:
+        if _catalog is not None and time.monotonic() - _checked_at < interval:
+            return _catalog
+        version = read_catalog_version()
+        if _catalog is None or version is None or version != _catalog.version:
+            _catalog = RecipeCatalog.load(version)
+        _checked_at = time.monotonic()
+        return _catalog
+
+
+def catalog_version():
+    # The version the plans are built from: the in-process catalog's when it
+    # is on, else the database's stamp
+    if getattr(settings, 'MEAL_CATALOG_CACHE', True):
+        return get_catalog().version
+    return read_catalog_version()
+
+
+def clear_catalog():
+    global _catalog
+    with _lock:
+        _catalog = None
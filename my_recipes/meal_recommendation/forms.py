@@ -64,3 +64,10 @@ class UserInputForm(forms.Form):
         required=False,
         widget=forms.TextInput(attrs={'placeholder': 'Enter custom allergen'})
     )
+
+    max_prep_time = forms.IntegerField(
+        label="Maximum prep time (in minutes)",
+        required=False,
+        min_value=1,
+        widget=forms.NumberInput(attrs={'placeholder': 'No limit'})
+    )
@@ -0,0 +1,186 @@
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from meal_recommendation.models import Recipe, Ingredient, SyncState
+
+# Columns copied from the ETL recipes table onto Recipe, besides name
+RECIPE_FIELDS = [
+    'category', 'total_time', 'prep_time', 'cook_time', 'total_minutes',
+    'prep_minutes', 'cook_minutes', 'calories', 'fat', 'protein', 'carbs',
+    'fiber', 'sugar', 'preparation_steps',
+]
+
+SYNC_STATE_NAME = 'recipes'
+
+# The watermark a sync leaves for the next one. updated_at is now(), the start
+# of the ETL transaction that wrote the row, so a load still running when the
+# sync reads max(updated_at) commits rows older than it. Holding the
+# watermark back by more than the longest load transaction makes the next
+# sync read those rows too; rows re-read inside the lag are just upserted again.
+WATERMARK_QUERY = """
+    SELECT least(max(updated_at), now() - make_interval(secs => %(lag)s))
+    FROM recipes
+"""
+
+# Live recipes changed after the watermark; the watermark is NULL for a full sync
+SOURCE_QUERY = f"""
+    SELECT id, name, {', '.join(RECIPE_FIELDS)}, ingredients
+    FROM recipes
+    WHERE deleted_at IS NULL
+    AND (%(watermark)s IS NULL OR updated_at > %(watermark)s)
+"""
+
+# Canonical ingredient names of a batch of recipes, parsed by the ETL
+INGREDIENTS_QUERY = """
+    SELECT edge.recipe_id, ingredient.name
+    FROM recipe_ingredients AS edge
+    JOIN ingredients AS ingredient ON ingredient.id = edge.ingredient_id
+    WHERE edge.recipe_id = ANY(%s)
+    ORDER BY edge.recipe_id, edge.position
+"""
+
+# Names soft-deleted after the watermark and not live in another category
+DELETED_QUERY = """
+    SELECT DISTINCT name
+    FROM recipes AS deleted
+    WHERE deleted_at IS NOT NULL
+    AND updated_at > %(watermark)s
+    AND NOT EXISTS (
+        SELECT 1 FROM recipes AS live
+        WHERE live.name = deleted.name AND live.deleted_at IS NULL
+    )
+"""
+
+
+class Command(BaseCommand):
+    help = "Sync recipes from PostgreSQL to Django models"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--full', action='store_true',
+            help="Resync every recipe and delete the ones no longer in the recipes table",
+        )
+
+    def handle(self, *args, **kwargs):
+        batch_size = kwargs['batch_size']
+        full = kwargs['full']
+
+        # The ETL tables live in the app's own database, so the sync reads
+        # them through Django's connection and its settings
+        state, _ = SyncState.objects.get_or_create(name=SYNC_STATE_NAME)
+        watermark = None if full else state.watermark
+
+        # Read the new watermark first: rows changed while the sync runs are
+        # newer than it and get picked up again next time
+        lag = getattr(settings, 'RECIPE_SYNC_WATERMARK_LAG_SECONDS', 600)
+        with connection.cursor() as cursor:
+            cursor.execute(WATERMARK_QUERY, {'lag': lag})
+            new_watermark = cursor.fetchone()[0]
+
+        # Stream the changed recipes through a server-side cursor, so only
+        # one batch is held in memory at a time. It is held open across the
+        # batches' commits.
+        cursor = connection.chunked_cursor()
+        cursor.execute(SOURCE_QUERY, {'watermark': watermark})
+
+        # Parsed ingredients, unless the ETL has not produced them yet
+        with connection.cursor() as check_cursor:
+            check_cursor.execute("SELECT to_regclass('recipe_ingredients') IS NOT NULL")
+            edges_cursor = connection.cursor() if check_cursor.fetchone()[0] else None
+
+        # Every ingredient name seen so far, mapped to its id
+        ingredient_ids = dict(Ingredient.objects.values_list('name', 'id'))
+        synced_names = set()
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            self.sync_batch(rows, ingredient_ids, edges_cursor)
+            synced_names.update(row[1] for row in rows)
+            self.stdout.write(f"Synced {len(synced_names)} recipes")
+        cursor.close()
+        if edges_cursor is not None:
+            edges_cursor.close()
+
+        if full:
+            # Everything live was just synced, so whatever else is left is gone
+            stale_ids = [
+                recipe_id for recipe_id, name in Recipe.objects.values_list('id', 'name')
+                if name not in synced_names
+            ]
+        else:
+            with connection.cursor() as deleted_cursor:
+                deleted_cursor.execute(DELETED_QUERY, {'watermark': watermark or datetime.min.replace(tzinfo=timezone.utc)})
+                deleted_names = [row[0] for row in deleted_cursor.fetchall()]
+            stale_ids = list(Recipe.objects.filter(name__in=deleted_names).values_list('id', flat=True))
+        for start in range(0, len(stale_ids), batch_size):
+            Recipe.objects.filter(id__in=stale_ids[start:start + batch_size]).delete()
+        if full:
+            # Includes ingredients left over from before lines were parsed
+            Ingredient.objects.filter(recipe__isnull=True).delete()
+
+        state.watermark = new_watermark
+        state.save()
+        self.stdout.write(self.style.SUCCESS(
+            f"Successfully synced recipes from PostgreSQL to Django models: "
+            f"{len(synced_names)} updated, {len(stale_ids)} deleted."
+        ))
+
+    @transaction.atomic
+    def sync_batch(self, rows, ingredient_ids, edges_cursor=None):
+        # Canonical ingredient names by source recipe id. Without the parsed
+        # tables, fall back to splitting the joined ingredients string.
+        parsed = {}
+        if edges_cursor is not None:
+            edges_cursor.execute(INGREDIENTS_QUERY, ([row[0] for row in rows],))
+            for source_id, ingredient_name in edges_cursor.fetchall():
+                parsed.setdefault(source_id, []).append(ingredient_name)
+
+        # Later rows with the same name win, as they did with update_or_create
+        recipes = {}
+        ingredient_names = {}
+        for row in rows:
+            source_id, name, *values, ingredients = row
+            recipes[name] = Recipe(name=name, **dict(zip(RECIPE_FIELDS, values)))
+            if edges_cursor is not None:
+                ingredient_names[name] = parsed.get(source_id, [])
+            else:
+                ingredient_names[name] = list(dict.fromkeys(ingredients.split(', '))) if ingredients else []
+
+        # Create or update the recipes with one INSERT ... ON CONFLICT; on
+        # PostgreSQL the primary keys come back for both cases
+        Recipe.objects.bulk_create(
+            recipes.values(),
+            update_conflicts=True,
+            unique_fields=['name'],
+            update_fields=RECIPE_FIELDS,
+        )
+
+        # Create only the ingredients not in the map yet
+        new_names = {
+            ingredient_name
+            for names in ingredient_names.values()
+            for ingredient_name in names
+            if ingredient_name not in ingredient_ids
+        }
+        if new_names:
+            created = Ingredient.objects.bulk_create(
+                [Ingredient(name=ingredient_name) for ingredient_name in new_names],
+                update_conflicts=True,
+                unique_fields=['name'],
+                update_fields=['name'],
+            )
+            ingredient_ids.update((ingredient.name, ingredient.id) for ingredient in created)
+
+        # Replace the ingredient links of the batch's recipes
+        RecipeIngredient = Recipe.ingredients.through
+        recipe_ids = [recipe.id for recipe in recipes.values()]
+        RecipeIngredient.objects.filter(recipe_id__in=recipe_ids).delete()
+        RecipeIngredient.objects.bulk_create([
+            RecipeIngredient(recipe_id=recipes[name].id, ingredient_id=ingredient_ids[ingredient_name])
+            for name, names in ingredient_names.items()
+            for ingredient_name in names
+        ])
@@ -0,0 +1,49 @@
+# Generated by Django 5.1.15 on 2026-10-18 12:20
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def merge_duplicate_names(apps, schema_editor):
+    # Names were never unique, so keep the oldest row of each name. Recipe
+    # links of dropped ingredients move to the one that is kept.
+    Ingredient = apps.get_model("meal_recommendation", "Ingredient")
+    Recipe = apps.get_model("meal_recommendation", "Recipe")
+    RecipeIngredient = Recipe.ingredients.through
+
+    for model in (Ingredient, Recipe):
+        duplicates = (
+            model.objects.values("name")
+            .annotate(keep_id=Min("id"), copies=Count("id"))
+            .filter(copies__gt=1)
+        )
+        for duplicate in duplicates:
+            extra = model.objects.filter(name=duplicate["name"]).exclude(id=duplicate["keep_id"])
+            if model is Ingredient:
+                recipe_ids = RecipeIngredient.objects.filter(ingredient__in=extra).values_list("recipe_id", flat=True)
+                RecipeIngredient.objects.bulk_create(
+                    [RecipeIngredient(recipe_id=recipe_id, ingredient_id=duplicate["keep_id"]) for recipe_id in set(recipe_ids)],
+                    ignore_conflicts=True,
+                )
+            extra.delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("meal_recommendation", "0002_recipe_carbs_recipe_cook_time_recipe_fat_and_more"),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_names, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name="ingredient",
+            name="name",
+            field=models.CharField(max_length=255, unique=True),
+        ),
+        migrations.AlterField(
+            model_name="recipe",
+            name="name",
+            field=models.CharField(max_length=255, unique=True),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.1.15 on 2026-10-18 12:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("meal_recommendation", "0004_syncstate"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="recipe",
+            name="cook_minutes",
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="recipe",
+            name="prep_minutes",
+            field=models.PositiveIntegerField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="recipe",
+            name="total_minutes",
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+    ]
@@ -1,14 +1,14 @@
 from django.db import models
 
 class Ingredient(models.Model):
-    name = models.CharField(max_length=255)
+    name = models.CharField(max_length=255, unique=True)
 
     def __str__(self):
         return self.name
 
 
 class Recipe(models.Model):
-    name = models.CharField(max_length=255)
+    name = models.CharField(max_length=255, unique=True)
     category = models.CharField(
         max_length=50,
         choices=[
@@ -23,6 +23,10 @@ class Recipe(models.Model):
     total_time = models.CharField(max_length=50, null=True, blank=True)
     prep_time = models.CharField(max_length=50, null=True, blank=True)
     cook_time = models.CharField(max_length=50, null=True, blank=True)
+    # The time strings parsed into minutes by the ETL, for filtering
+    total_minutes = models.PositiveIntegerField(null=True, blank=True)
+    prep_minutes = models.PositiveIntegerField(null=True, blank=True, db_index=True)
+    cook_minutes = models.PositiveIntegerField(null=True, blank=True)
     calories = models.FloatField(null=True, blank=True)
     fat = models.FloatField(null=True, blank=True)
     protein = models.FloatField(null=True, blank=True)
@@ -34,3 +38,14 @@ class Recipe(models.Model):
 
     def __str__(self):
         return self.name
+
+
+class SyncState(models.Model):
+    # How far sync_recipes has read the ETL recipes table: the newest
+    # recipes.updated_at it has synced, less RECIPE_SYNC_WATERMARK_LAG_SECONDS
+    name = models.CharField(max_length=100, unique=True)
+    watermark = models.DateTimeField(null=True, blank=True)
+    synced_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} @ {self.watermark}"
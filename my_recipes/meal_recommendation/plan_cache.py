@@ -0,0 +1,142 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+
+
+class LocalPlanStore:
+    # Process-local LRU of weekly plans, at most `max_entries` of them
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._plans = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            plan = self._plans.get(key)
+            if plan is not None:
+                self._plans.move_to_end(key)
+            return plan
+
+    def set(self, key, plan):
+        with self._lock:
+            self._plans[key] = plan
+            self._plans.move_to_end(key)
+            while len(self._plans) > self.max_entries:
+                self._plans.popitem(last=False)
+
+    def version_changed(self):
+        # Plans of the old version can never hit again
+        with self._lock:
+            self._plans.clear()
+
+    def __len__(self):
+        return len(self._plans)
+
+
+class DjangoPlanStore:
+    # Plans kept in one of settings.CACHES, e.g. a locmem or file-based
+    # backend, which does its own eviction
+    def __init__(self, alias):
+        self.alias = alias
+        self.cache = caches[alias]
+
+    def _cache_key(self, key):
+        return "meal-plan:" + hashlib.md5(repr(key).encode()).hexdigest()
+
+    def get(self, key):
+        return self.cache.get(self._cache_key(key))
+
+    def set(self, key, plan):
+        self.cache.set(self._cache_key(key), plan)
+
+    def version_changed(self):
+        # The backend may be shared with other processes still on the old
+        # version, so old plans are left to expire rather than cleared
+        pass
+
+    def __len__(self):
+        return 0
+
+
+class PlanCache:
+    # Weekly plans keyed by the catalog version and a normalized profile.
+    # Nothing is cached while the catalog has no version stamp, since there
+    # would be no way to tell when it changed.
+    def __init__(self, store):
+        self.store = store
+        self.version = None
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def get_or_plan(self, version, key, plan):
+        if version is None:
+            return plan()
+        with self._lock:
+            if version != self.version:
+                self.version = version
+                self.store.version_changed()
+
+        key = (version, *key)
+        weekly_plan = self.store.get(key)
+        with self._lock:
+            if weekly_plan is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        if weekly_plan is None:
+            weekly_plan = plan()
+            self.store.set(key, weekly_plan)
+        return weekly_plan
+
+    def stats(self):
+        return {
+            'backend': getattr(self.store, 'alias', 'local'),
+            'version': self.version,
+            'hits': self.hits,
+            'misses': self.misses,
+            'entries': len(self.store),
+        }
+
+
+class NoPlanCache:
+    # Stands in for PlanCache when MEAL_PLAN_CACHE_SIZE is 0
+    hits = misses = 0
+
+    def get_or_plan(self, version, key, plan):
+        return plan()
+
+    def stats(self):
+        return {'backend': None, 'version': None, 'hits': 0, 'misses': 0, 'entries': 0}
+
+
+_lock = threading.Lock()
+_plan_cache = None
+
+
+def get_plan_cache():
+    # The process-wide plan cache, built from settings on first use: an LRU
+    # of MEAL_PLAN_CACHE_SIZE plans, or the MEAL_PLAN_CACHE_ALIAS backend
+    global _plan_cache
+    if _plan_cache is not None:
+        return _plan_cache
+    with _lock:
+        if _plan_cache is None:
+            alias = getattr(settings, 'MEAL_PLAN_CACHE_ALIAS', None)
+            size = getattr(settings, 'MEAL_PLAN_CACHE_SIZE', 1024)
+            if alias:
+                _plan_cache = PlanCache(DjangoPlanStore(alias))
+            elif size:
+                _plan_cache = PlanCache(LocalPlanStore(size))
+            else:
+                _plan_cache = NoPlanCache()
+        return _plan_cache
+
+
+def clear_plan_cache():
+    global _plan_cache
+    with _lock:
+        _plan_cache = None
@@ -0,0 +1,297 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections, connection
+
+from .catalog import NUTRIENT_FIELDS, RECIPE_FIELDS, allergen_mask, catalog_version, get_catalog
+from .plan_cache import get_plan_cache
+
+try:
+    from scipy.optimize import linear_sum_assignment
+except ImportError:  # optional, optimize_week falls back to its greedy solver
+    linear_sum_assignment = None
+
+ACTIVITY_MULTIPLIER = {
+    'sedentary': 1.2,
+    'light': 1.375,
+    'moderate': 1.55,
+    'active': 1.725,
+    'very_active': 1.9,
+}
+
+# Share of the daily calories that goes to each meal
+MEAL_SPLIT = {
+    "Breakfast": 0.25,
+    "Lunch": 0.35,
+    "Dinner": 0.3,
+    "Snacks": 0.1,
+}
+
+DAYS = 7
+
+# Share of the daily calories that comes from protein, fat and carbs
+MACRO_SPLIT = {
+    'lose': (0.30, 0.30, 0.40),
+    'maintain': (0.25, 0.30, 0.45),
+    'gain': (0.25, 0.25, 0.50),
+}
+
+# kcal per gram of protein, fat and carbs
+KCAL_PER_GRAM = np.array([4.0, 9.0, 4.0])
+
+# Cost of missing a meal's target by 100% on each of NUTRIENT_FIELDS, so
+# calories still matter most
+NUTRIENT_WEIGHTS = np.array([1.0, 0.5, 0.25, 0.25])
+
+# Relative miss charged for a nutrient the recipe has no value for
+MISSING_NUTRIENT_MISS = 1.0
+
+# Every recipe of a category that passes the filters, the same set the
+# catalog serves. The optimizer scores calories and macros together, so any
+# recipe can be the best match for some meal. The category is read with one
+# range scan on its (category, ...) indexes.
+# Listed allergens are excluded with the precomputed bitmask, recipes over
+# the time budget with a predicate on the parsed prep_minutes column.
+CANDIDATES_QUERY = f"""
+    SELECT {', '.join(RECIPE_FIELDS)}
+    FROM recipes
+    WHERE category = %s
+    AND calories IS NOT NULL
+    AND deleted_at IS NULL
+    AND allergen_mask & %s = 0
+    {{prep_time_clause}}
+    {{custom_allergen_clause}}
+    ORDER BY calories, name
+"""
+
+# Recipes containing a custom allergen. The ILIKE is served by the trigram
+# index on ingredients.
+CUSTOM_ALLERGEN_QUERY = """
+    SELECT name FROM recipes
+    WHERE category = %s
+    AND deleted_at IS NULL
+    AND ingredients ILIKE %s
+"""
+
+
+def calculate_daily_calories(age, height, weight, gender, activity_level, fitness_goals):
+    if gender == 'M':
+        bmr = 10 * weight + 6.25 * height - 5 * age + 5
+    else:
+        bmr = 10 * weight + 6.25 * height - 5 * age - 161
+
+    daily_calories = bmr * ACTIVITY_MULTIPLIER[activity_level]
+
+    if fitness_goals == 'lose':
+        daily_calories -= 500  # Calorie deficit
+    elif fitness_goals == 'gain':
+        daily_calories += 500  # Calorie surplus
+    return daily_calories
+
+
+def like_pattern(text):
+    escaped = text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return f"%{escaped}%"
+
+
+def candidates_query(category, allergens, other_allergen='', max_prep_minutes=None):
+    prep_time_clause = ''
+    params = [category, allergen_mask(allergens)]
+    if max_prep_minutes is not None:
+        prep_time_clause = "AND prep_minutes <= %s"
+        params.append(max_prep_minutes)
+    custom_allergen_clause = ''
+    if other_allergen:
+        custom_allergen_clause = f"AND name NOT IN ({CUSTOM_ALLERGEN_QUERY})"
+        params += [category, like_pattern(other_allergen)]
+    sql = CANDIDATES_QUERY.format(prep_time_clause=prep_time_clause, custom_allergen_clause=custom_allergen_clause)
+    return sql, params
+
+
+def fetch_candidates(category, allergens, other_allergen='', max_prep_minutes=None):
+    with connection.cursor() as cursor:
+        cursor.execute(*candidates_query(category, allergens, other_allergen, max_prep_minutes))
+        return [dict(zip(RECIPE_FIELDS, row)) for row in cursor.fetchall()]
+
+
+def fetch_custom_allergen_names(category, other_allergen):
+    with connection.cursor() as cursor:
+        cursor.execute(CUSTOM_ALLERGEN_QUERY, [category, like_pattern(other_allergen)])
+        return frozenset(row[0] for row in cursor.fetchall())
+
+
+def get_candidates(category, allergens, other_allergen='', max_prep_minutes=None):
+    # Candidate recipes sorted by calories and name, plus their
+    # NUTRIENT_FIELDS values as a matrix with one row per recipe.
+    # Served from the in-process catalog unless MEAL_CATALOG_CACHE is off, in
+    # which case the same recipes are fetched with one query. A custom
+    # allergen costs one extra indexed query with the catalog.
+    if getattr(settings, 'MEAL_CATALOG_CACHE', True):
+        excluded_names = fetch_custom_allergen_names(category, other_allergen) if other_allergen else frozenset()
+        return get_catalog().category(category).select(allergen_mask(allergens), excluded_names, max_prep_minutes)
+    candidates = fetch_candidates(category, allergens, other_allergen, max_prep_minutes)
+    nutrients = np.array(
+        [[recipe[field] for field in NUTRIENT_FIELDS] for recipe in candidates], dtype=np.float64,
+    ).reshape(len(candidates), len(NUTRIENT_FIELDS))
+    return candidates, nutrients
+
+
+def nutrient_targets(daily_calories, fitness_goals):
+    # Calories and protein, fat and carbs grams for each meal, one row per
+    # meal of MEAL_SPLIT in NUTRIENT_FIELDS order
+    split = np.array(MACRO_SPLIT.get(fitness_goals, MACRO_SPLIT['maintain']))
+    daily = np.concatenate(([daily_calories], daily_calories * split / KCAL_PER_GRAM))
+    return np.outer(list(MEAL_SPLIT.values()), daily)
+
+
+def score_matrix(nutrients, targets):
+    # Weighted relative miss of every candidate (columns) against every
+    # meal's targets (rows), in one broadcast over all nutrients
+    targets = np.maximum(targets, 1.0)[:, None, :]
+    miss = np.abs(nutrients[None, :, :] - targets) / targets
+    miss = np.where(np.isnan(miss), MISSING_NUTRIENT_MISS, miss)
+    return miss @ NUTRIENT_WEIGHTS
+
+
+def shortlist(scores, per_meal):
+    # Columns among the `per_meal` best of any meal. With per_meal slots in
+    # the week, an optimal plan only ever needs these: a recipe outside a
+    # meal's shortlist can be swapped for an unused one inside it at no cost.
+    if scores.shape[1] <= per_meal:
+        return np.arange(scores.shape[1])
+    best = np.argpartition(scores, per_meal - 1, axis=1)[:, :per_meal]
+    return np.unique(best)
+
+
+def solve_greedy(cost):
+    # Takes the cheapest remaining (slot, recipe) pair until the slots or the
+    # recipes run out. Bounded by min(cost.shape) passes over the matrix.
+    cost = cost.copy()
+    rows, columns = [], []
+    for _ in range(min(cost.shape)):
+        row, column = np.unravel_index(np.argmin(cost), cost.shape)
+        if np.isinf(cost[row, column]):
+            break
+        rows.append(row)
+        columns.append(column)
+        cost[row, :] = np.inf
+        cost[:, column] = np.inf
+    return np.array(rows, dtype=np.intp), np.array(columns, dtype=np.intp)
+
+
+def optimize_week(candidates, nutrients, daily_calories, fitness_goals, budget_ms=None):
+    # Plans the week against per-meal calorie and macro targets. Every
+    # candidate is scored against every meal at once, then the DAYS slots of
+    # each meal are matched to distinct recipes at minimum total miss with
+    # linear_sum_assignment. The greedy solver runs instead when scipy is
+    # missing or half of MEAL_PLAN_BUDGET_MS is already gone. Candidate names
+    # must be unique, as they are within a category.
+    start = time.perf_counter()
+    if budget_ms is None:
+        budget_ms = getattr(settings, 'MEAL_PLAN_BUDGET_MS', 50)
+    weekly_plan = {f"Day {day + 1}": dict.fromkeys(MEAL_SPLIT) for day in range(DAYS)}
+    if not candidates:
+        return weekly_plan
+
+    scores = score_matrix(nutrients, nutrient_targets(daily_calories, fitness_goals))
+    columns = shortlist(scores, DAYS * len(MEAL_SPLIT))
+    # One row per slot: DAYS rows for the first meal, then the next meal
+    cost = np.repeat(scores[:, columns], DAYS, axis=0)
+
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    if linear_sum_assignment is not None and elapsed_ms < budget_ms / 2:
+        rows, picked = linear_sum_assignment(cost)
+    else:
+        rows, picked = solve_greedy(cost)
+
+    meals = list(MEAL_SPLIT)
+    for row, column in zip(rows, picked):
+        meal, day = divmod(int(row), DAYS)
+        weekly_plan[f"Day {day + 1}"][meals[meal]] = dict(candidates[columns[column]])
+    return weekly_plan
+
+
+def recommend_week(category, allergens, daily_calories, fitness_goals, other_allergen='', max_prep_minutes=None):
+    return recommend_weeks([{
+        'category': category,
+        'allergens': allergens,
+        'daily_calories': daily_calories,
+        'fitness_goals': fitness_goals,
+        'other_allergen': other_allergen,
+        'max_prep_minutes': max_prep_minutes,
+    }])[0]
+
+
+def recommend_weeks(profiles):
+    # The optimized week for each profile, a dict of recommend_week's
+    # arguments. Calorie targets are rounded to MEAL_PLAN_CALORIE_STEP so
+    # that profiles landing on the same target, category, goal and filters
+    # share one cached plan until the catalog version changes. Plans missing
+    # from the cache are built from one candidate pool per category and
+    # filters, fetched at most once for the whole batch.
+    step = getattr(settings, 'MEAL_PLAN_CALORIE_STEP', 10)
+    requests = []
+    for profile in profiles:
+        target = round(profile['daily_calories'] / step) * step
+        other_allergen = profile.get('other_allergen', '').strip()
+        filters = (
+            profile['category'], tuple(sorted(set(profile['allergens']))),
+            other_allergen.lower(), profile.get('max_prep_minutes'),
+        )
+        requests.append((filters, other_allergen, target, profile['fitness_goals']))
+
+    pools = {}
+
+    def pool(filters, other_allergen):
+        if filters not in pools:
+            category, allergens, _, max_prep_minutes = filters
+            pools[filters] = get_candidates(category, allergens, other_allergen, max_prep_minutes)
+        return pools[filters]
+
+    if not requests:
+        return []
+    plan_cache = get_plan_cache()
+    version = catalog_version()
+    weekly_plans = []
+    for filters, other_allergen, target, fitness_goals in requests:
+        weekly_plans.append(plan_cache.get_or_plan(
+            version, (*filters, target, fitness_goals),
+            lambda: optimize_week(*pool(filters, other_allergen), target, fitness_goals),
+        ))
+    return weekly_plans
+
+
+_executor_lock = threading.Lock()
+_executor = None
+
+
+def plan_executor():
+    # Threads the async views plan on. There are at most
+    # MEAL_PLAN_ASYNC_WORKERS of them, each with its own database connection,
+    # so a burst of requests queues here instead of opening connections.
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'MEAL_PLAN_ASYNC_WORKERS', 8), thread_name_prefix='meal-plan',
+            )
+        return _executor
+
+
+def _recommend_weeks_in_worker(profiles):
+    # Executor threads see no request signals, so their connections are
+    # checked against CONN_MAX_AGE here, as a request thread's would be
+    close_old_connections()
+    try:
+        return recommend_weeks(profiles)
+    finally:
+        close_old_connections()
+
+
+async def arecommend_weeks(profiles):
+    # recommend_weeks for async views, run on the bounded plan executor
+    return await sync_to_async(_recommend_weeks_in_worker, thread_sensitive=False, executor=plan_executor())(profiles)
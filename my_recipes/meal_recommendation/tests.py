@@ -1,3 +1,437 @@
-from django.test import TestCase
+import json
+from io import StringIO
+from unittest import skipUnless
 
-# Create your tests here.
+import numpy as np
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from benchmarks.calorie_greedy import plan_week
+
+from .catalog import clear_catalog
+from .models import Ingredient, Recipe
+from .plan_cache import LocalPlanStore, PlanCache, clear_plan_cache
+from .planner import (
+    DAYS, MEAL_SPLIT, candidates_query, fetch_candidates, linear_sum_assignment, nutrient_targets,
+    optimize_week, recommend_week, score_matrix, shortlist,
+)
+
+# The recipes table is written by the ETL, not by a Django migration, so the
+# tests recreate the parts of it the planner reads, with the ETL's indexes.
+RECIPES_TABLE = """
+    CREATE TABLE recipes (
+        id bigint PRIMARY KEY,
+        category text,
+        name text,
+        prep_time text,
+        cook_time text,
+        prep_minutes integer,
+        ingredients text,
+        calories double precision,
+        fat double precision,
+        protein double precision,
+        carbs double precision,
+        allergen_mask integer,
+        deleted_at timestamptz
+    );
+    CREATE UNIQUE INDEX recipes_category_name_key ON recipes (category, name);
+    CREATE INDEX recipes_category_calories_idx ON recipes (category, calories);
+    CREATE INDEX recipes_category_prep_minutes_idx ON recipes (category, prep_minutes);
+"""
+
+
+def create_recipes():
+    # 5000 recipes in each of three categories, with the calories spread
+    # over the macros in varying shares, and a catalog version stamp
+    with connection.cursor() as cursor:
+        cursor.execute(RECIPES_TABLE)
+        cursor.execute("""
+            INSERT INTO recipes (
+                id, category, name, ingredients, calories, protein, fat, carbs, allergen_mask, prep_minutes
+            )
+            SELECT i * 10 + n, category, category || ' ' || i, 'salt, pepper', calories,
+                   calories * (10 + i % 25) / 400.0, calories * (15 + i % 20) / 900.0,
+                   calories * (75 - i % 25 - i % 20) / 400.0, i % 4, NULLIF(i % 61, 0)
+            FROM generate_series(1, 5000) AS i,
+                 LATERAL (SELECT (i * 7919) % 1200 AS calories) AS c,
+                 unnest(ARRAY['Healthy', 'Vegan', 'Low Carb']) WITH ORDINALITY AS k(category, n)
+        """)
+        cursor.execute("CREATE TABLE recipes_catalog_version (version bigint)")
+        cursor.execute("INSERT INTO recipes_catalog_version VALUES (1)")
+        cursor.execute("ANALYZE recipes")
+
+
+@skipUnless(connection.vendor == 'postgresql', "recipes table is PostgreSQL only")
+class CandidatesQueryTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        create_recipes()
+
+    def setUp(self):
+        clear_catalog()
+        clear_plan_cache()
+        self.addCleanup(clear_catalog)
+        self.addCleanup(clear_plan_cache)
+
+    def explain(self, sql, params):
+        with connection.cursor() as cursor:
+            # Sequential and bitmap scans are priced out, so a query that
+            # cannot be answered from an index shows up as a Seq Scan node
+            cursor.execute("SET LOCAL enable_seqscan = off")
+            cursor.execute("SET LOCAL enable_bitmapscan = off")
+            cursor.execute(f"EXPLAIN {sql}", params)
+            return "\n".join(row[0] for row in cursor.fetchall())
+
+    def test_query_scans_the_category_through_an_index(self):
+        plan = self.explain(*candidates_query('Healthy', ['peanuts']))
+        self.assertIn("Index Scan using recipes_category_", plan)
+        self.assertNotIn("Seq Scan", plan)
+
+    def test_query_with_custom_allergen_and_prep_time_uses_an_index(self):
+        plan = self.explain(*candidates_query('Vegan', [], 'pepper', max_prep_minutes=15))
+        self.assertIn("Index Scan using recipes_category_", plan)
+        self.assertNotIn("Seq Scan", plan)
+
+    def test_fetch_returns_the_filtered_category_in_catalog_order(self):
+        candidates = fetch_candidates('Vegan', ['lactose'], max_prep_minutes=30)
+        keys = [(recipe['calories'], recipe['name']) for recipe in candidates]
+        self.assertEqual(keys, sorted(keys))
+        self.assertTrue(all(recipe['category'] == 'Vegan' for recipe in candidates))
+        self.assertTrue(all(recipe['prep_minutes'] <= 30 for recipe in candidates))
+        with connection.cursor() as cursor:
+            cursor.execute("""
+                SELECT count(*) FROM recipes
+                WHERE category = 'Vegan' AND allergen_mask & 1 = 0 AND prep_minutes <= 30
+            """)
+            self.assertEqual(len(candidates), cursor.fetchone()[0])
+
+    def test_catalog_and_database_paths_plan_the_same_week(self):
+        profiles = [
+            ('Healthy', [], 1900, 'lose', '', None),
+            ('Vegan', ['lactose'], 2800, 'gain', '', None),
+            ('Low Carb', ['beef', 'gluten'], 2300, 'maintain', 'paprika', 45),
+        ]
+        for profile in profiles:
+            plans = []
+            for catalog_cache in (True, False):
+                clear_plan_cache()
+                with override_settings(MEAL_CATALOG_CACHE=catalog_cache):
+                    plans.append(recommend_week(*profile))
+            self.assertEqual(plans[0], plans[1], profile)
+
+
+def synthetic_candidates(count, seed=0):
+    # Recipes sorted by calories, with the calories spread over the macros at random
+    rng = np.random.default_rng(seed)
+    calories = np.sort(rng.uniform(50, 1200, count))
+    grams = calories[:, None] * rng.dirichlet([2.0, 2.0, 3.0], count) / np.array([4.0, 9.0, 4.0])
+    nutrients = np.column_stack([calories, grams])
+    candidates = [
+        {'name': f"recipe {i}", 'calories': row[0], 'protein': row[1], 'fat': row[2], 'carbs': row[3]}
+        for i, row in enumerate(nutrients)
+    ]
+    return candidates, nutrients
+
+
+def plan_cost(weekly_plan, daily_calories, fitness_goals):
+    targets = nutrient_targets(daily_calories, fitness_goals)
+    total = 0.0
+    for day_plan in weekly_plan.values():
+        for recipe, meal_target in zip(day_plan.values(), targets):
+            row = np.array([[recipe['calories'], recipe['protein'], recipe['fat'], recipe['carbs']]])
+            total += score_matrix(row, meal_target[None, :])[0, 0]
+    return total
+
+
+class OptimizeWeekTests(SimpleTestCase):
+    def test_plan_fills_every_slot_without_repeats(self):
+        candidates, nutrients = synthetic_candidates(500)
+        weekly_plan = optimize_week(candidates, nutrients, 2200, 'lose')
+        names = [recipe['name'] for day_plan in weekly_plan.values() for recipe in day_plan.values()]
+        self.assertEqual(len(weekly_plan), DAYS)
+        self.assertEqual(len(names), DAYS * len(MEAL_SPLIT))
+        self.assertEqual(len(set(names)), len(names))
+
+    def test_too_few_candidates_leave_empty_slots(self):
+        candidates, nutrients = synthetic_candidates(10)
+        weekly_plan = optimize_week(candidates, nutrients, 2000, 'maintain')
+        recipes = [recipe for day_plan in weekly_plan.values() for recipe in day_plan.values()]
+        self.assertEqual(sum(recipe is not None for recipe in recipes), 10)
+        self.assertEqual(optimize_week([], np.empty((0, 4)), 2000, 'maintain')["Day 1"]["Lunch"], None)
+
+    def test_greedy_solver_within_exhausted_budget(self):
+        candidates, nutrients = synthetic_candidates(500, seed=1)
+        greedy = optimize_week(candidates, nutrients, 2600, 'gain', budget_ms=0)
+        self.assertTrue(all(recipe is not None for day_plan in greedy.values() for recipe in day_plan.values()))
+        if linear_sum_assignment is not None:
+            exact = optimize_week(candidates, nutrients, 2600, 'gain')
+            self.assertLessEqual(plan_cost(exact, 2600, 'gain'), plan_cost(greedy, 2600, 'gain') + 1e-9)
+
+    def test_optimizer_beats_calorie_only_plan_on_its_targets(self):
+        candidates, nutrients = synthetic_candidates(2000, seed=2)
+        optimized = optimize_week(candidates, nutrients, 1900, 'lose')
+        calorie_only = plan_week(candidates, nutrients[:, 0], 1900)
+        self.assertLess(plan_cost(optimized, 1900, 'lose'), plan_cost(calorie_only, 1900, 'lose'))
+
+    @skipUnless(linear_sum_assignment is not None, "scipy is not installed")
+    def test_shortlist_keeps_the_optimal_assignment(self):
+        for seed in range(5):
+            _, nutrients = synthetic_candidates(300, seed=seed)
+            scores = score_matrix(nutrients, nutrient_targets(2000, 'maintain'))
+            full = np.repeat(scores, DAYS, axis=0)
+            rows, columns = linear_sum_assignment(full)
+            kept = np.repeat(scores[:, shortlist(scores, DAYS * len(MEAL_SPLIT))], DAYS, axis=0)
+            kept_rows, kept_columns = linear_sum_assignment(kept)
+            self.assertAlmostEqual(full[rows, columns].sum(), kept[kept_rows, kept_columns].sum())
+
+
+class PlanCacheTests(SimpleTestCase):
+    def test_repeated_profile_hits(self):
+        cache = PlanCache(LocalPlanStore(10))
+        plans = iter([{'plan': 1}, {'plan': 2}])
+        first = cache.get_or_plan(1, ('Vegan', 2000), lambda: next(plans))
+        second = cache.get_or_plan(1, ('Vegan', 2000), lambda: next(plans))
+        self.assertIs(first, second)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+        self.assertEqual(cache.stats()['entries'], 1)
+
+    def test_least_recently_used_plan_is_evicted(self):
+        store = LocalPlanStore(2)
+        store.set('a', 1)
+        store.set('b', 2)
+        store.get('a')
+        store.set('c', 3)
+        self.assertEqual((store.get('a'), store.get('b'), store.get('c')), (1, None, 3))
+
+    def test_catalog_version_change_invalidates(self):
+        cache = PlanCache(LocalPlanStore(10))
+        cache.get_or_plan(1, ('Vegan', 2000), lambda: {'version': 1})
+        plan = cache.get_or_plan(2, ('Vegan', 2000), lambda: {'version': 2})
+        self.assertEqual(plan, {'version': 2})
+        self.assertEqual((cache.hits, cache.misses, cache.stats()['entries']), (0, 2, 1))
+
+    def test_unversioned_catalog_is_not_cached(self):
+        cache = PlanCache(LocalPlanStore(10))
+        cache.get_or_plan(None, ('Vegan', 2000), dict)
+        self.assertEqual((cache.hits, cache.misses, cache.stats()['entries']), (0, 0, 0))
+
+
+class MealPlanApiTests(SimpleTestCase):
+    def post(self, url, body):
+        return self.client.post(url, body, content_type='application/json')
+
+    def test_invalid_json_is_rejected(self):
+        response = self.post('/api/meal-plan/', 'not json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_invalid_profile_returns_form_errors(self):
+        response = self.post('/api/meal-plan/', json.dumps({'age': 'x', 'gender': 'M'}))
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('age', response.json()['errors'])
+
+    def test_batch_reports_errors_per_profile(self):
+        response = self.post('/api/meal-plan/batch/', json.dumps({'profiles': [{'age': 30}, 'x']}))
+        self.assertEqual(response.status_code, 200)
+        plans = response.json()['plans']
+        self.assertEqual(len(plans), 2)
+        self.assertTrue(all('errors' in plan for plan in plans))
+
+    @override_settings(MEAL_PLAN_BATCH_MAX_PROFILES=2)
+    def test_batch_size_is_limited(self):
+        response = self.post('/api/meal-plan/batch/', json.dumps({'profiles': [{}, {}, {}]}))
+        self.assertEqual(response.status_code, 400)
+
+    def test_plans_are_post_only(self):
+        self.assertEqual(self.client.get('/api/meal-plan/').status_code, 405)
+        self.assertEqual(self.client.get('/api/meal-plan/async/').status_code, 405)
+
+    async def test_async_endpoint_validates_like_the_sync_one(self):
+        response = await self.async_client.post(
+            '/api/meal-plan/async/', json.dumps({'age': 'x'}), content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('age', response.json()['errors'])
+
+
+@skipUnless(connection.vendor == 'postgresql', "recipes table is PostgreSQL only")
+class MealPlanApiPlanningTests(TestCase):
+    PROFILE = {
+        'age': 30, 'height': 175, 'weight': 70, 'gender': 'M', 'activity_level': 'moderate',
+        'fitness_goals': 'lose', 'dietary_preference': 'Vegan', 'allergens': ['lactose'],
+    }
+
+    @classmethod
+    def setUpTestData(cls):
+        create_recipes()
+
+    def setUp(self):
+        # Neither the catalog nor the plans may come from another test's data
+        clear_catalog()
+        clear_plan_cache()
+        self.addCleanup(clear_catalog)
+        self.addCleanup(clear_plan_cache)
+
+    def post(self, url, body):
+        return self.client.post(url, json.dumps(body), content_type='application/json')
+
+    def assertWeek(self, weekly_plan, category):
+        self.assertEqual(list(weekly_plan), [f"Day {day + 1}" for day in range(DAYS)])
+        recipes = [recipe for day_plan in weekly_plan.values() for recipe in day_plan.values()]
+        self.assertEqual(len(recipes), DAYS * len(MEAL_SPLIT))
+        self.assertTrue(all(recipe['category'] == category for recipe in recipes))
+        self.assertEqual(len({recipe['name'] for recipe in recipes}), len(recipes))
+
+    def test_profile_gets_a_week(self):
+        response = self.post('/api/meal-plan/', self.PROFILE)
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertGreater(data['daily_calories'], 0)
+        self.assertWeek(data['weekly_plan'], 'Vegan')
+
+    def test_batch_keeps_profile_order_around_invalid_entries(self):
+        profiles = [
+            self.PROFILE,
+            {'age': 'x'},
+            dict(self.PROFILE, dietary_preference='Low Carb', fitness_goals='gain', weight=90),
+            dict(self.PROFILE, dietary_preference='Healthy', allergens=[]),
+        ]
+        response = self.post('/api/meal-plan/batch/', {'profiles': profiles})
+        self.assertEqual(response.status_code, 200)
+        plans = response.json()['plans']
+        self.assertEqual(len(plans), 4)
+        self.assertIn('age', plans[1]['errors'])
+        self.assertNotIn('weekly_plan', plans[1])
+        for plan, category in zip([plans[0], plans[2], plans[3]], ['Vegan', 'Low Carb', 'Healthy']):
+            self.assertWeek(plan['weekly_plan'], category)
+
+        single = self.post('/api/meal-plan/', self.PROFILE).json()
+        self.assertEqual(plans[0], single)
+
+
+# The columns sync_recipes copies, as the ETL writes them
+SYNC_RECIPES_TABLE = """
+    CREATE TABLE recipes (
+        id bigint PRIMARY KEY,
+        category text,
+        name text,
+        total_time text,
+        prep_time text,
+        cook_time text,
+        total_minutes integer,
+        prep_minutes integer,
+        cook_minutes integer,
+        calories double precision,
+        fat double precision,
+        protein double precision,
+        carbs double precision,
+        fiber double precision,
+        sugar double precision,
+        preparation_steps text,
+        ingredients text,
+        updated_at timestamptz NOT NULL DEFAULT now(),
+        deleted_at timestamptz
+    )
+"""
+
+# The ETL's parsed ingredient tables, as far as the sync reads them
+SYNC_INGREDIENT_TABLES = """
+    CREATE TABLE ingredients (id bigint PRIMARY KEY, name text);
+    CREATE TABLE recipe_ingredients (recipe_id bigint, ingredient_id bigint, position integer);
+"""
+
+
+@skipUnless(connection.vendor == 'postgresql', "recipes table is PostgreSQL only")
+class SyncRecipesTests(TestCase):
+    def setUp(self):
+        with connection.cursor() as cursor:
+            cursor.execute(SYNC_RECIPES_TABLE)
+
+    def add_recipe(self, recipe_id, name, updated_at="now()", ingredients='salt, pepper'):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO recipes (id, category, name, calories, ingredients, updated_at) "
+                f"VALUES (%s, 'Vegan', %s, 300, %s, {updated_at})",
+                [recipe_id, name, ingredients],
+            )
+
+    def execute(self, sql, params=None):
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+
+    def sync(self, *args):
+        call_command('sync_recipes', *args, stdout=StringIO())
+
+    def ingredient_names(self, name):
+        return set(Recipe.objects.get(name=name).ingredients.values_list('name', flat=True))
+
+    def test_recipe_committed_after_a_sync_with_an_older_timestamp_is_synced(self):
+        self.add_recipe(1, 'Soup')
+        self.sync()
+        # A load that started before the sync read its watermark, and
+        # committed after it
+        self.add_recipe(2, 'Stew', "now() - interval '1 minute'")
+        self.sync()
+        self.assertEqual(set(Recipe.objects.values_list('name', flat=True)), {'Soup', 'Stew'})
+
+    @override_settings(RECIPE_SYNC_WATERMARK_LAG_SECONDS=0)
+    def test_without_a_lag_the_watermark_is_the_newest_updated_at(self):
+        self.add_recipe(1, 'Soup')
+        self.sync()
+        self.add_recipe(2, 'Stew', "now() - interval '1 minute'")
+        self.sync()
+        self.assertEqual(list(Recipe.objects.values_list('name', flat=True)), ['Soup'])
+
+
+    def test_resync_replaces_the_ingredients_of_a_changed_recipe(self):
+        self.add_recipe(1, 'Soup', ingredients='salt, pepper, salt')
+        self.add_recipe(2, 'Stew', ingredients='salt, beef')
+        self.sync()
+        self.assertEqual(self.ingredient_names('Soup'), {'salt', 'pepper'})
+        salt_id = Ingredient.objects.get(name='salt').id
+
+        self.execute("UPDATE recipes SET ingredients = 'salt, leek', calories = 250, updated_at = now() WHERE id = 1")
+        self.sync()
+        soup = Recipe.objects.get(name='Soup')
+        self.assertEqual(soup.calories, 250)
+        self.assertEqual(self.ingredient_names('Soup'), {'salt', 'leek'})
+        self.assertEqual(self.ingredient_names('Stew'), {'salt', 'beef'})
+        # Existing ingredients are reused, not created again
+        self.assertEqual(Ingredient.objects.get(name='salt').id, salt_id)
+        self.assertEqual(Recipe.objects.count(), 2)
+
+    def test_parsed_ingredient_edges_are_used_when_the_etl_has_them(self):
+        self.execute(SYNC_INGREDIENT_TABLES)
+        self.execute("INSERT INTO ingredients VALUES (10, 'milk'), (11, 'oat'), (12, 'honey')")
+        self.execute("INSERT INTO recipe_ingredients VALUES (1, 10, 0), (1, 11, 1)")
+        self.add_recipe(1, 'Porridge', ingredients='1 cup milk, 1/2 cup oats')
+        self.sync()
+        self.assertEqual(self.ingredient_names('Porridge'), {'milk', 'oat'})
+
+        self.execute("DELETE FROM recipe_ingredients WHERE recipe_id = 1 AND ingredient_id = 10")
+        self.execute("INSERT INTO recipe_ingredients VALUES (1, 12, 1)")
+        self.execute("UPDATE recipes SET updated_at = now() WHERE id = 1")
+        self.sync()
+        self.assertEqual(self.ingredient_names('Porridge'), {'oat', 'honey'})
+
+    def test_soft_deleted_recipe_is_removed_by_an_incremental_sync(self):
+        self.add_recipe(1, 'Soup')
+        self.add_recipe(2, 'Stew')
+        self.sync()
+        self.execute("UPDATE recipes SET deleted_at = now(), updated_at = now() WHERE id = 2")
+        self.sync()
+        self.assertEqual(list(Recipe.objects.values_list('name', flat=True)), ['Soup'])
+
+    def test_full_sync_deletes_recipes_gone_from_the_table(self):
+        self.add_recipe(1, 'Soup')
+        self.add_recipe(2, 'Stew', ingredients='salt, beef')
+        self.sync()
+        self.execute("DELETE FROM recipes WHERE id = 2")
+        self.sync()
+        # A hard delete leaves nothing for an incremental sync to see
+        self.assertEqual(Recipe.objects.count(), 2)
+
+        self.sync('--full')
+        self.assertEqual(list(Recipe.objects.values_list('name', flat=True)), ['Soup'])
+        # Ingredients no recipe uses any more go with it
+        self.assertEqual(set(Ingredient.objects.values_list('name', flat=True)), {'salt', 'pepper'})
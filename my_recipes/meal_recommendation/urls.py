@@ -4,4 +4,9 @@ from . import views
 urlpatterns = [
     path('', views.home, name='home'),  # Home page
     path('recommend/', views.recommend_meal_plan, name='recommend_meal_plan'),
+    path('recommend/async/', views.recommend_meal_plan_async, name='recommend_meal_plan_async'),
+    path('stats/plan-cache/', views.plan_cache_stats, name='plan_cache_stats'),
+    path('api/meal-plan/', views.api_meal_plan, name='api_meal_plan'),
+    path('api/meal-plan/async/', views.api_meal_plan_async, name='api_meal_plan_async'),
+    path('api/meal-plan/batch/', views.api_meal_plan_batch, name='api_meal_plan_batch'),
 ]
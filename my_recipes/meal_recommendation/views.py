@@ -1,8 +1,13 @@
-import random
+import json
+
+from django.conf import settings
+from django.http import JsonResponse
 from django.shortcuts import render
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
 from .forms import UserInputForm
-from .models import Recipe
-from django.db import connection
+from .plan_cache import get_plan_cache
+from .planner import arecommend_weeks, calculate_daily_calories, recommend_week, recommend_weeks
 
 def home(request):
     return render(request, 'meal_recommendation/home.html')
@@ -20,84 +25,20 @@ def recommend_meal_plan(request):
             fitness_goals = form.cleaned_data['fitness_goals']
             dietary_preference = form.cleaned_data['dietary_preference']
             allergens = form.cleaned_data['allergens']
+            other_allergen = form.cleaned_data['other_allergen'].strip()
+            max_prep_time = form.cleaned_data['max_prep_time']
 
             # Calculate daily calorie needs
-            if gender == 'M':
-                bmr = 10 * weight + 6.25 * height - 5 * age + 5
-            else:
-                bmr = 10 * weight + 6.25 * height - 5 * age - 161
-
-            activity_multiplier = {
-                'sedentary': 1.2,
-                'light': 1.375,
-                'moderate': 1.55,
-                'active': 1.725,
-                'very_active': 1.9,
-            }
-            daily_calories = bmr * activity_multiplier[activity_level]
-
-            if fitness_goals == 'lose':
-                daily_calories -= 500  # Calorie deficit
-            elif fitness_goals == 'gain':
-                daily_calories += 500  # Calorie surplus
-
-            # Divide daily calories among meals
-            meals_per_day = {
-                "Breakfast": 0.25 * daily_calories,
-                "Lunch": 0.35 * daily_calories,
-                "Dinner": 0.3 * daily_calories,
-                "Snacks": 0.1 * daily_calories,
-            }
-
-            # Track used recipes to avoid repetition
-            used_recipes = set()
-
-            # Fetch recipes from PostgreSQL based on dietary preference, allergens, and calories
-            weekly_plan = {}
-            for day in range(7):
-                day_plan = {}
-                for meal, calorie_target in meals_per_day.items():
-                    query = f"""
-                        SELECT name, calories, category, prep_time, cook_time, ingredients, protein, fat, carbs 
-                        FROM recipes
-                        WHERE category = %s 
-                        AND calories IS NOT NULL 
-                        AND NOT EXISTS (
-                            SELECT 1 FROM unnest(string_to_array(ingredients, ', ')) AS ing
-                            WHERE ing ILIKE ANY (ARRAY[%s])
-                        )
-                        AND name NOT IN %s
-                        ORDER BY ABS(calories - %s)
-                        LIMIT 1
-                    """
-                    with connection.cursor() as cursor:
-                        allergens_array = [f"%{allergen}%" for allergen in allergens] if allergens else []
-                        cursor.execute(query, [
-                            dietary_preference,
-                            allergens_array,
-                            tuple(used_recipes) if used_recipes else ('dummy_recipe',),
-                            calorie_target
-                        ])
-                        result = cursor.fetchone()
-
-                    if result:
-                        recipe_name, recipe_calories, category, prep_time, cook_time, ingredients, protein, fat, carbs = result
-                        day_plan[meal] = {
-                            'name': recipe_name,
-                            'calories': recipe_calories,
-                            'category': category,
-                            'prep_time': prep_time,
-                            'cook_time': cook_time,
-                            'ingredients': ingredients,
-                            'protein': protein,
-                            'fat': fat,
-                            'carbs': carbs
-                        }
-                        used_recipes.add(recipe_name)
-                    else:
-                        day_plan[meal] = None  # No recipe available
-
-                weekly_plan[f"Day {day + 1}"] = day_plan
+            daily_calories = calculate_daily_calories(
+                age, height, weight, gender, activity_level, fitness_goals
+            )
+
+            # Match the week to the calorie and macro targets of the goal,
+            # from the candidates for this preference, these allergens and
+            # the time budget. Identical profiles share a cached plan.
+            weekly_plan = recommend_week(
+                dietary_preference, allergens, daily_calories, fitness_goals, other_allergen, max_prep_time
+            )
 
             # Render the weekly plan
             return render(request, 'meal_recommendation/result.html', {
@@ -108,3 +49,114 @@ def recommend_meal_plan(request):
         form = UserInputForm()
 
     return render(request, 'meal_recommendation/form.html', {'form': form})
+
+async def recommend_meal_plan_async(request):
+    # recommend_meal_plan for ASGI, planning on the bounded plan executor
+    if request.method == "POST":
+        form = UserInputForm(request.POST)
+        if form.is_valid():
+            profile = profile_from_form(form)
+            weekly_plan = (await arecommend_weeks([profile]))[0]
+            return render(request, 'meal_recommendation/result.html', {
+                'weekly_plan': weekly_plan,
+                'daily_calories': profile['daily_calories'],
+            })
+    else:
+        form = UserInputForm()
+
+    return render(request, 'meal_recommendation/form.html', {'form': form})
+
+def plan_cache_stats(request):
+    return JsonResponse(get_plan_cache().stats())
+
+
+def profile_from_form(form):
+    # The planner's profile for a valid UserInputForm
+    data = form.cleaned_data
+    return {
+        'category': data['dietary_preference'],
+        'allergens': data['allergens'],
+        'daily_calories': calculate_daily_calories(
+            data['age'], data['height'], data['weight'], data['gender'],
+            data['activity_level'], data['fitness_goals'],
+        ),
+        'fitness_goals': data['fitness_goals'],
+        'other_allergen': data['other_allergen'].strip(),
+        'max_prep_minutes': data['max_prep_time'],
+    }
+
+
+def read_json(request):
+    # The request body as JSON, or None when it is not valid JSON
+    try:
+        return json.loads(request.body)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+# Profiles are posted as JSON objects with the fields of UserInputForm and
+# answered with the daily calories and the weekly plan, as on result.html
+
+def read_api_profile(request):
+    # (profile, None) for a valid JSON profile, else (None, error response)
+    data = read_json(request)
+    if not isinstance(data, dict):
+        return None, JsonResponse({'error': "Expected a JSON object"}, status=400)
+    form = UserInputForm(data)
+    if not form.is_valid():
+        return None, JsonResponse({'errors': form.errors.get_json_data()}, status=400)
+    return profile_from_form(form), None
+
+
+@csrf_exempt
+@require_POST
+def api_meal_plan(request):
+    profile, error = read_api_profile(request)
+    if error:
+        return error
+    weekly_plan = recommend_week(**profile)
+    return JsonResponse({'daily_calories': profile['daily_calories'], 'weekly_plan': weekly_plan})
+
+
+@csrf_exempt
+@require_POST
+async def api_meal_plan_async(request):
+    # api_meal_plan for ASGI: the event loop hands the planning to the
+    # bounded plan executor and keeps serving other requests meanwhile
+    profile, error = read_api_profile(request)
+    if error:
+        return error
+    weekly_plan = (await arecommend_weeks([profile]))[0]
+    return JsonResponse({'daily_calories': profile['daily_calories'], 'weekly_plan': weekly_plan})
+
+
+@csrf_exempt
+@require_POST
+def api_meal_plan_batch(request):
+    # {"profiles": [...]} -> {"plans": [...]}, one entry per profile in the
+    # same order. A profile that fails validation gets its errors in place of
+    # a plan without failing the rest of the batch.
+    data = read_json(request)
+    profiles = data.get('profiles') if isinstance(data, dict) else None
+    if not isinstance(profiles, list):
+        return JsonResponse({'error': "Expected a JSON object with a \"profiles\" list"}, status=400)
+    max_profiles = getattr(settings, 'MEAL_PLAN_BATCH_MAX_PROFILES', 1000)
+    if len(profiles) > max_profiles:
+        return JsonResponse({'error': f"At most {max_profiles} profiles per batch"}, status=400)
+
+    results = []
+    valid = []
+    for profile in profiles:
+        form = UserInputForm(profile if isinstance(profile, dict) else {})
+        if form.is_valid():
+            valid.append(profile_from_form(form))
+            results.append({'daily_calories': valid[-1]['daily_calories']})
+        else:
+            results.append({'errors': form.errors.get_json_data()})
+
+    # All valid profiles are planned together, sharing candidate pools
+    weekly_plans = iter(recommend_weeks(valid))
+    for result in results:
+        if 'errors' not in result:
+            result['weekly_plan'] = next(weekly_plans)
+    return JsonResponse({'plans': results})
@@ -12,5 +12,8 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "my_recipes.settings")
+# Sync views run on a new thread per request here, so a persistent
+# connection would be opened per thread and never reused
+os.environ.setdefault("RECIPE_DB_CONN_MAX_AGE", "0")
 
 application = get_asgi_application()
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -74,14 +75,25 @@ WSGI_APPLICATION = "my_recipes.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
+# The RECIPE_DB_* variables are shared with the ETL's Dagster resources.
+# Connections are kept for RECIPE_DB_CONN_MAX_AGE seconds and checked before
+# reuse. Under ASGI, where sync views run on a new thread per request, asgi.py
+# defaults it to 0; set RECIPE_DB_PSYCOPG_POOL_SIZE there instead: it turns
+# on psycopg 3's connection pool (needs psycopg[pool] and Django 5.1) and
+# turns persistent connections off.
+DB_POOL_SIZE = int(os.getenv("RECIPE_DB_PSYCOPG_POOL_SIZE", "0"))
+
 DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.postgresql",
-        'NAME': 'Recipe',
-        'USER': 'postgres',
-        'PASSWORD': 'Performance@99',
-        'HOST': 'localhost',
-        'PORT': '5432',  
+        'NAME': os.getenv("RECIPE_DB_NAME", 'Recipe'),
+        'USER': os.getenv("RECIPE_DB_USER", 'postgres'),
+        'PASSWORD': os.getenv("RECIPE_DB_PASSWORD", ''),
+        'HOST': os.getenv("RECIPE_DB_HOST", 'localhost'),
+        'PORT': os.getenv("RECIPE_DB_PORT", '5432'),
+        'CONN_MAX_AGE': 0 if DB_POOL_SIZE else int(os.getenv("RECIPE_DB_CONN_MAX_AGE", "60")),
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {"pool": {"min_size": 1, "max_size": DB_POOL_SIZE}} if DB_POOL_SIZE else {},
     }
 }
 
@@ -126,3 +138,41 @@ STATIC_URL = "static/"
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
+
+
+# Meal planning
+
+# Serve plan candidates from an in-process copy of the recipes table
+MEAL_CATALOG_CACHE = True
+
+# How often (seconds) to check the ETL's catalog version stamp for changes
+MEAL_CATALOG_VERSION_CHECK_SECONDS = 30
+
+# Per-request time budget of the meal plan optimizer; past half of it the
+# exact assignment is skipped for the greedy one
+MEAL_PLAN_BUDGET_MS = 50
+
+# Weekly plans are cached per calorie target rounded to this many kcal,
+# category, goal and filters, until the catalog version changes
+MEAL_PLAN_CALORIE_STEP = 10
+
+# Plans held in the process-local LRU; 0 turns plan caching off
+MEAL_PLAN_CACHE_SIZE = 1024
+
+# Name of a CACHES entry (e.g. a locmem or file-based backend) to keep plans
+# in instead of the process-local LRU
+MEAL_PLAN_CACHE_ALIAS = None
+
+# Most profiles accepted by one call of the batch meal plan API
+MEAL_PLAN_BATCH_MAX_PROFILES = 1000
+
+# Threads the async planning views run the planner on under ASGI, and so
+# the most database connections they hold
+MEAL_PLAN_ASYNC_WORKERS = 8
+
+
+# Recipe sync
+
+# How far (seconds) sync_recipes holds its watermark behind the newest
+# recipes.updated_at; must exceed the longest ETL load transaction
+RECIPE_SYNC_WATERMARK_LAG_SECONDS = 600